@@ -2,6 +2,7 @@
 
 -- Extensões
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- 1. Profiles
 CREATE TABLE IF NOT EXISTS profiles (
@@ -142,6 +143,9 @@ CREATE INDEX IF NOT EXISTS idx_vouchers_code ON vouchers(code);
 CREATE INDEX IF NOT EXISTS idx_vouchers_valid_until ON vouchers(valid_until);
 CREATE INDEX IF NOT EXISTS idx_order_refunds_order_id ON order_refunds(order_id);
 
+-- Índice trigram: busca parcial de e-mail (ILIKE '%...%') no backoffice sem seq scan
+CREATE INDEX IF NOT EXISTS idx_profiles_email_trgm ON profiles USING gin (email gin_trgm_ops);
+
 -- Migração: dados de pagamento PIX/boleto para o usuário copiar (quando pendente)
 ALTER TABLE orders ADD COLUMN IF NOT EXISTS payment_code TEXT;
 ALTER TABLE orders ADD COLUMN IF NOT EXISTS payment_url TEXT;
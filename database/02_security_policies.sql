@@ -73,7 +73,7 @@ BEGIN
     WITH filtered AS (
         SELECT p.id, p.email, p.role, p.created_at
         FROM public.profiles p
-        WHERE (p_email IS NULL OR coalesce(p.email, '') ILIKE '%' || p_email || '%')
+        WHERE (p_email IS NULL OR p.email ILIKE '%' || p_email || '%')
           AND (p_role IS NULL OR p.role = p_role)
     ),
     counted AS (
@@ -332,6 +332,7 @@ module "shipping_lambda" {
     MELHOR_ENVIO_TOKEN      = data.aws_ssm_parameter.app["melhor_envio_token"].value
     MELHOR_ENVIO_API_URL    = data.aws_ssm_parameter.app["melhor_envio_api_url"].value
     CEP_ORIGEM              = data.aws_ssm_parameter.app["cep_origem"].value
+    QUOTE_TTL_SEC           = "30"
     POWERTOOLS_SERVICE_NAME = "shipping"
   }
 
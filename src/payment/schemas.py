@@ -1,6 +1,9 @@
+import re
 from typing import List, Optional
 from pydantic import BaseModel, Field, field_validator
 
+_NON_DIGIT = re.compile(r"\D+")
+
 class Identification(BaseModel):
     type: str = Field(default="CPF", description="Tipo de documento")
     number: str = Field(..., description="Número do documento")
@@ -43,7 +46,10 @@ class Item(BaseModel):
     size: Optional[str] = "Único"
 
 def _normalize_cep(v: str) -> str:
-    digits = "".join(c for c in str(v).strip() if c.isdigit())
+    raw = str(v).strip()
+    if len(raw) == 8 and raw.isdigit():
+        return raw
+    digits = _NON_DIGIT.sub("", raw)
     if len(digits) != 8:
         raise ValueError("CEP deve conter 8 dígitos")
     return digits
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.parser import parse
 from shared.responses import http_response
@@ -8,6 +10,13 @@ from schemas import ProductInput, ProductUpdate
 
 logger = Logger(service="products")
 
+
+@lru_cache(maxsize=1)
+def _get_service() -> ProductService:
+    """Service (e repository/cliente Supabase) reaproveitado entre invocações quentes."""
+    return ProductService()
+
+
 @logger.inject_lambda_context
 def lambda_handler(event, context):
     try:
@@ -29,7 +38,7 @@ def lambda_handler(event, context):
         if method == "OPTIONS":
             return http_response(200, {})
 
-        service = ProductService()
+        service = _get_service()
 
         # --- GET ---
         if method == "GET":
@@ -1,5 +1,8 @@
 from shared.database import get_supabase_client
 
+# Colunas da listagem (cards/tabela); description fica para o detalhe (get_by_id)
+LIST_COLUMNS = "id,name,price,category,size,image,images,quantity,stock,is_featured,material,pattern,created_at"
+
 class ProductRepository:
     def __init__(self):
         self.db = get_supabase_client()
@@ -7,7 +10,7 @@ class ProductRepository:
 
     def get_products_paginated(self, start: int, end: int, filters: dict = None):
         # count="exact" garante que o retorno inclua o total de itens FILTRADOS
-        query = self.db.table("products").select("*", count="exact")
+        query = self.db.table("products").select(LIST_COLUMNS, count="exact")
 
         if filters:
             # 1. Filtro de Nome (Case Insensitive)
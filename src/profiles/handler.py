@@ -1,17 +1,35 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
 from aws_lambda_powertools import Logger
-from aws_lambda_powertools.utilities.typing import LambdaContext
 
+from shared.fastjson import loads
 from shared.responses import http_response
 from shared.supabase_utils import get_authorization_header
 from schemas import ProfileFilter, ProfileUpdate, ProfileDelete
-from service import ProfileService
+
+if TYPE_CHECKING:
+    from aws_lambda_powertools.utilities.typing import LambdaContext
 
 # Inicializa Logger estruturado
 logger = Logger(service="profiles")
 
+# Validadores compilados do Pydantic, resolvidos uma vez no import
+_FILTER_VALIDATE = ProfileFilter.__pydantic_validator__.validate_python
+_UPDATE_VALIDATE = ProfileUpdate.__pydantic_validator__.validate_python
+_DELETE_VALIDATE = ProfileDelete.__pydantic_validator__.validate_python
+
+
+@lru_cache(maxsize=1)
+def _get_service():
+    """Service reaproveitado entre invocações quentes (import tardio: OPTIONS não carrega supabase)."""
+    from service import ProfileService
+
+    return ProfileService()
+
 
 @logger.inject_lambda_context
-def lambda_handler(event: dict, context: LambdaContext):
+def lambda_handler(event: dict, context: "LambdaContext"):
     """
     Handler para gerenciamento de perfis de usuários (Backoffice).
     
@@ -27,20 +45,20 @@ def lambda_handler(event: dict, context: LambdaContext):
         return http_response(200, {})
     
     try:
-        service = ProfileService()
+        service = _get_service()
         query_params = event.get("queryStringParameters") or {}
         admin_user_id = query_params.get("user_id")
         
         # GET: Listagem com filtros
         if method == "GET":
             # Valida e converte para ProfileFilter
-            filters = ProfileFilter(
-                page=int(query_params.get("page", 1)),
-                limit=int(query_params.get("limit", 10)),
-                email=query_params.get("email"),
-                role=query_params.get("role"),
-                sort=query_params.get("sort", "newest")
-            )
+            filters = _FILTER_VALIDATE({
+                "page": query_params.get("page", 1),
+                "limit": query_params.get("limit", 10),
+                "email": query_params.get("email"),
+                "role": query_params.get("role"),
+                "sort": query_params.get("sort", "newest"),
+            })
             
             logger.info(f"Listando perfis: page={filters.page}, limit={filters.limit}")
             
@@ -53,10 +71,9 @@ def lambda_handler(event: dict, context: LambdaContext):
         
         # PUT: Atualização de perfil
         elif method == "PUT":
-            import json
-            body = json.loads(event.get("body", "{}"))
+            body = loads(event.get("body", "{}"))
             
-            payload = ProfileUpdate(**body)
+            payload = _UPDATE_VALIDATE(body)
             logger.info(f"Atualizando perfil {payload.id}")
             
             updated = service.update_profile(payload)
@@ -64,10 +81,9 @@ def lambda_handler(event: dict, context: LambdaContext):
         
         # DELETE: Remoção de perfil
         elif method == "DELETE":
-            import json
-            body = json.loads(event.get("body", "{}"))
+            body = loads(event.get("body", "{}"))
             
-            payload = ProfileDelete(**body)
+            payload = _DELETE_VALIDATE(body)
             
             # Extrai user_id do contexto (se disponível, para validação)
             # Exemplo: event.get("requestContext", {}).get("authorizer", {}).get("sub")
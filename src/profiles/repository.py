@@ -1,6 +1,16 @@
 from shared.database import get_supabase_client
 from schemas import ProfileFilter
 
+# Colunas exibidas na listagem do backoffice
+LIST_COLUMNS = "id,email,role,created_at"
+
+# sort -> (coluna, desc)
+_SORT = {
+    "newest": ("created_at", True),
+    "role_asc": ("role", False),
+    "role_desc": ("role", True),
+}
+
 
 class ProfileRepository:
     """Repository para operações no banco de dados (tabela profiles)."""
@@ -26,7 +36,10 @@ class ProfileRepository:
                 return rpc_result
 
         # 1. Inicia query base
-        query = self.db.table("profiles").select("*", count="exact")
+        # Sem filtro, count="estimated" (exato em tabelas pequenas, estimativa do planner quando
+        # cresce); com filtro a estimativa erra o total das páginas, então o count é exato
+        count_mode = "exact" if filters.email or filters.role else "estimated"
+        query = self.db.table("profiles").select(LIST_COLUMNS, count=count_mode)
         
         # 2. Aplica filtros
         if filters.email:
@@ -38,15 +51,8 @@ class ProfileRepository:
             query = query.eq("role", filters.role)
         
         # 3. Aplica ordenação
-        sort_mapping = {
-            "newest": ("created_at", False),  # (coluna, ascending)
-            "role_asc": ("role", True),
-            "role_desc": ("role", False),
-        }
-        
-        sort_column, ascending = sort_mapping.get(filters.sort, ("created_at", False))
-        # Supabase order: order(column, desc=True/False)
-        query = query.order(sort_column, desc=not ascending)
+        sort_column, desc = _SORT.get(filters.sort, _SORT["newest"])
+        query = query.order(sort_column, desc=desc)
         
         # 4. Aplica paginação usando range
         # Supabase range é 0-indexed e inclusivo: range(0, 9) retorna 10 itens
@@ -27,8 +27,8 @@ class ProfileFilter(BaseModel):
     @field_validator("email")
     @classmethod
     def clean_email(cls, v: Optional[str]) -> Optional[str]:
-        """Remove espaços extras do email."""
-        return v.strip() if v else None
+        """Remove espaços extras do email; vazio vira None (sem ilike '%%')."""
+        return (v.strip() or None) if v else None
 
 
 class ProfileUpdate(BaseModel):
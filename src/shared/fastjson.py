@@ -0,0 +1,48 @@
+"""
+JSON dos handlers com a implementação escolhida uma vez no import: orjson -> ujson -> json (stdlib).
+
+- loads: aceita str ou bytes. Erros de parse são sempre ValueError (JSONDecodeError de cada backend).
+- dumps: retorna str (body do API Gateway).
+- dumps_bytes: retorna bytes (corpo de requisições HTTP), sem encode extra quando o backend é orjson.
+
+``default`` recebe os tipos que o backend não serializa nativamente (ex.: Decimal).
+"""
+
+import json
+from typing import Any, Callable, Optional
+
+Default = Optional[Callable[[Any], Any]]
+
+try:
+    import orjson
+
+    BACKEND = "orjson"
+    loads = orjson.loads
+    # Chaves não-str (ex.: int) viram string, como no json da stdlib
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj: Any, default: Default = None) -> bytes:
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+
+    def dumps(obj: Any, default: Default = None) -> str:
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS).decode()
+
+except ImportError:  # fora do layer (ex.: wheel indisponível na arquitetura, testes locais)
+    try:
+        import ujson
+
+        BACKEND = "ujson"
+        loads = ujson.loads
+
+        def dumps(obj: Any, default: Default = None) -> str:
+            return ujson.dumps(obj, default=default, ensure_ascii=False, escape_forward_slashes=False)
+
+    except ImportError:
+        BACKEND = "json"
+        loads = json.loads
+
+        def dumps(obj: Any, default: Default = None) -> str:
+            return json.dumps(obj, default=default)
+
+    def dumps_bytes(obj: Any, default: Default = None) -> bytes:
+        return dumps(obj, default).encode("utf-8")
@@ -1,10 +1,9 @@
 import os
 from datetime import datetime
 from decimal import Decimal
+from functools import cache
 from typing import Any, Dict, List, Optional, Tuple
 
-import firebase_admin
-from firebase_admin import credentials, db
 from aws_lambda_powertools import Logger
 
 logger = Logger(service="firebase")
@@ -12,6 +11,10 @@ logger = Logger(service="firebase")
 _firebase_db = None
 
 
+class _ProductNotFound(Exception):
+    """Nó products/{id} inexistente: aborta a transação de estoque sem gravar."""
+
+
 def _firebase_config_from_ssm() -> Optional[Tuple[str, str, str, str]]:
     """
     When SSM_APP_SECRETS_PREFIX is set (e.g. /loja-omena/terraform/prod), load
@@ -39,6 +42,32 @@ def _firebase_config_from_ssm() -> Optional[Tuple[str, str, str, str]]:
     )
 
 
+@cache
+def _firebase_credentials() -> Tuple[str, str, str, str]:
+    """
+    Resolve (project_id, client_email, private_key, database_url) uma vez por container,
+    com a private_key já normalizada ('\\n' literal -> quebra de linha).
+
+    Raises:
+        ValueError: If required environment variables are missing (não fica em cache).
+    """
+    from_ssm = _firebase_config_from_ssm()
+    if from_ssm:
+        project_id, client_email, private_key, database_url = from_ssm
+    else:
+        project_id = os.environ.get("FIREBASE_PROJECT_ID")
+        client_email = os.environ.get("FIREBASE_CLIENT_EMAIL")
+        private_key = os.environ.get("FIREBASE_PRIVATE_KEY")
+        database_url = os.environ.get("FIREBASE_DATABASE_URL")
+
+    if not (project_id and client_email and private_key and database_url):
+        raise ValueError(
+            "Firebase credentials missing: set SSM_APP_SECRETS_PREFIX or "
+            "FIREBASE_PROJECT_ID, FIREBASE_CLIENT_EMAIL, FIREBASE_PRIVATE_KEY, FIREBASE_DATABASE_URL"
+        )
+    return project_id, client_email, private_key.replace('\\n', '\n'), database_url
+
+
 def get_firebase_db():
     """
     Initializes Firebase Admin SDK with service account credentials from environment variables.
@@ -52,27 +81,16 @@ def get_firebase_db():
     
     if _firebase_db is not None:
         return _firebase_db
+
+    # Import tardio: o SDK (e suas dependências do Google) só carrega no primeiro uso do Firebase.
+    import firebase_admin
+    from firebase_admin import credentials, db
     
     try:
         firebase_admin.get_app()
         logger.info("Firebase Admin SDK already initialized (reusing existing app)")
     except ValueError:
-        from_ssm = _firebase_config_from_ssm()
-        if from_ssm:
-            project_id, client_email, private_key, database_url = from_ssm
-        else:
-            project_id = os.environ.get("FIREBASE_PROJECT_ID")
-            client_email = os.environ.get("FIREBASE_CLIENT_EMAIL")
-            private_key = os.environ.get("FIREBASE_PRIVATE_KEY")
-            database_url = os.environ.get("FIREBASE_DATABASE_URL")
-
-        if not all([project_id, client_email, private_key, database_url]):
-            raise ValueError(
-                "Firebase credentials missing: set SSM_APP_SECRETS_PREFIX or "
-                "FIREBASE_PROJECT_ID, FIREBASE_CLIENT_EMAIL, FIREBASE_PRIVATE_KEY, FIREBASE_DATABASE_URL"
-            )
-        
-        private_key = private_key.replace('\\n', '\n')
+        project_id, client_email, private_key, database_url = _firebase_credentials()
         
         cred_dict = {
             "type": "service_account",
@@ -168,14 +186,37 @@ def get_product_by_id(product_id: int):
         return None
 
 
+def _apply_sale_to_product(data: Any, size_sold: str, sold_qty: int) -> Dict[str, Any]:
+    """
+    Aplica a baixa de estoque no nó do produto e recalcula o total.
+
+    Raises:
+        _ProductNotFound: Produto não existe. Retornar None não abortaria a transação
+            (o SDK tentaria gravar None e falharia com ValueError); a exceção a interrompe sem gravar.
+    """
+    if not isinstance(data, dict):
+        raise _ProductNotFound()
+    current_stock = data.get("stock")
+    if not isinstance(current_stock, dict):
+        current_stock = {}
+    if size_sold in current_stock:
+        current_stock[size_sold] = max(0, int(current_stock[size_sold]) - sold_qty)
+    elif "Único" in current_stock:
+        current_stock["Único"] = max(0, int(current_stock["Único"]) - sold_qty)
+    data["stock"] = current_stock
+    data["quantity"] = sum(int(v) for v in current_stock.values())
+    return data
+
+
 def decrement_products_quantity(items: List[Any]) -> None:
     """
     Atualiza no Firebase a quantidade dos produtos vendidos (subtrai do estoque),
     como uma edição de backoffice: apenas os itens vendidos, pelo ID.
 
-    Para cada item: lê só esse produto por ID (get_product_by_id), subtrai
-    a quantidade vendida do tamanho correspondente (ou 'Único'), recalcula o total
-    e faz update apenas nesse nó. Custo: 1 read + 1 write por item do pedido.
+    Para cada item: roda uma transação no nó do produto (products/{id}), subtrai
+    a quantidade vendida do tamanho correspondente (ou 'Único') e recalcula o total.
+    A transação (compare-and-set no servidor) evita perder baixas de pedidos
+    concorrentes, em Lambdas diferentes ou no mesmo container.
 
     Args:
         items: Lista de itens com .id, .quantity e opcionalmente .size (default 'Único').
@@ -195,21 +236,16 @@ def decrement_products_quantity(items: List[Any]) -> None:
         if product_id is None or sold_qty <= 0:
             continue
         try:
-            data = get_product_by_id(product_id)
-            if not data:
+            ref = get_firebase_db().child("products").child(str(product_id))
+            try:
+                updated = ref.transaction(
+                    lambda current: _apply_sale_to_product(current, size_sold, sold_qty)
+                )
+            except _ProductNotFound:
                 logger.warning(f"Product {product_id} not found in Firebase, skipping quantity update")
                 continue
-            current_stock = data.get("stock")
-            if not isinstance(current_stock, dict):
-                current_stock = {}
-            if size_sold in current_stock:
-                current_stock[size_sold] = max(0, int(current_stock[size_sold]) - sold_qty)
-            else:
-                if "Único" in current_stock:
-                    current_stock["Único"] = max(0, int(current_stock["Único"]) - sold_qty)
-            new_total = sum(int(v) for v in current_stock.values())
-            ref = get_firebase_db().child("products").child(str(product_id))
-            ref.update({"quantity": new_total, "stock": current_stock})
-            logger.info(f"Firebase: product {product_id} quantity updated (sold {sold_qty}, new total {new_total})")
+            logger.info(
+                f"Firebase: product {product_id} quantity updated (sold {sold_qty}, new total {updated['quantity']})"
+            )
         except Exception as e:
             logger.error(f"Firebase stock update failed for product {product_id}: {e}")
@@ -4,13 +4,20 @@ Melhor Envio API client: quote, cart, shipment and tracking operations.
 Expects env: MELHOR_ENVIO_TOKEN, CEP_ORIGEM; optional MELHOR_ENVIO_API_URL.
 """
 
-import json
 import math
 import os
 import ssl
-import urllib.error
-import urllib.request
-from typing import Any
+from contextlib import contextmanager
+from functools import cache
+from types import MappingProxyType
+from typing import Any, Iterator, Mapping
+
+import urllib3
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from urllib3.exceptions import TimeoutError as Urllib3TimeoutError
+
+from shared.fastjson import dumps_bytes, loads
 
 DEFAULT_API_BASE = "https://sandbox.melhorenvio.com.br"
 CALCULATE_PATH = "/api/v2/me/shipment/calculate"
@@ -19,6 +26,63 @@ CHECKOUT_PATH = "/api/v2/me/shipment/checkout"
 GENERATE_PATH = "/api/v2/me/shipment/generate"
 TRACKING_PATH = "/api/v2/me/shipment/tracking"
 REQUEST_TIMEOUT_SEC = 15
+CONNECT_TIMEOUT_SEC = 5
+# Bytes do corpo de erro lidos para a mensagem (páginas de erro podem ser enormes)
+ERROR_BODY_MAX_BYTES = 4096
+
+# Pool HTTP no escopo do módulo: invocações quentes reaproveitam a conexão TLS (keep-alive).
+# Sem retry por padrão: cada chamada escolhe o seu (_API_RETRY, _QUOTE_RETRY ou nenhum),
+# para nenhum chamador herdar um orçamento de tentativas sem querer.
+# Contexto TLS criado uma vez (carrega o bundle de CAs); novas conexões do pool o reutilizam.
+_SSL_CTX = ssl.create_default_context()
+
+_http = urllib3.PoolManager(
+    num_pools=1,
+    maxsize=4,
+    ssl_context=_SSL_CTX,
+    retries=False,
+    timeout=urllib3.Timeout(connect=CONNECT_TIMEOUT_SEC, read=REQUEST_TIMEOUT_SEC),
+)
+
+# Retry das chamadas genéricas (carrinho, checkout, etiquetas): retry de status só vale para
+# métodos idempotentes (padrão do urllib3), então POST não é reenviado após a API receber o
+# corpo; falhas de conexão (nada enviado) são retentadas.
+_API_RETRY = urllib3.Retry(
+    total=2,
+    backoff_factor=0.1,
+    status_forcelist=(502, 503, 504),
+    raise_on_status=False,
+)
+
+# Teto para o Retry-After da API: a resposta precisa caber no limite ~30s do API Gateway
+RETRY_AFTER_MAX_SEC = 2.0
+
+
+class _CappedRetry(urllib3.Retry):
+    """Retry que respeita Retry-After, mas nunca espera mais que RETRY_AFTER_MAX_SEC."""
+
+    def get_retry_after(self, response: Any) -> float | None:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, RETRY_AFTER_MAX_SEC)
+
+
+# Cotação (calculate) é só leitura: pode ser reenviada, inclusive em 429/5xx transitórios.
+# read=0: timeout de leitura não é retentado (só falhas de conexão e status da lista).
+_QUOTE_RETRY = _CappedRetry(
+    total=2,
+    read=0,
+    backoff_factor=0.2,
+    status_forcelist=(429, 502, 503, 504),
+    allowed_methods=frozenset({"POST"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+
+# Orçamento por tentativa da cotação com retry (connect + read): 3 tentativas x 7s + 2 esperas
+# de no máximo RETRY_AFTER_MAX_SEC = 25s, dentro do limite ~30s do API Gateway
+QUOTE_ATTEMPT_TIMEOUT_SEC = 7.0
+_QUOTE_RETRY_TIMEOUT = urllib3.Timeout(total=QUOTE_ATTEMPT_TIMEOUT_SEC, connect=CONNECT_TIMEOUT_SEC)
 
 
 class MelhorEnvioAPIError(Exception):
@@ -27,6 +91,9 @@ class MelhorEnvioAPIError(Exception):
     pass
 
 
+# Configuração lida uma vez por container (o env da Lambda não muda entre invocações).
+# Erros de variável ausente não ficam em cache.
+@cache
 def _env(key: str, default: str | None = None) -> str:
     value = os.environ.get(key) or default
     if not value and key in ("MELHOR_ENVIO_TOKEN", "CEP_ORIGEM"):
@@ -34,35 +101,95 @@ def _env(key: str, default: str | None = None) -> str:
     return value or ""
 
 
+@cache
+def _url(path: str) -> str:
+    """URL completa do endpoint (base do env + path), montada uma vez por path."""
+    return (os.environ.get("MELHOR_ENVIO_API_URL") or DEFAULT_API_BASE).rstrip("/") + path
+
+
+@cache
+def _headers() -> Mapping[str, str]:
+    """Headers fixos (com o Bearer já interpolado), somente leitura e compartilhados entre chamadas."""
+    return MappingProxyType({
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "Authorization": f"Bearer {_env('MELHOR_ENVIO_TOKEN', '')}",
+    })
+
+
+def _is_timeout(reason: Any) -> bool:
+    # NewConnectionError herda de ConnectTimeoutError no urllib3, mas é conexão recusada/DNS.
+    return isinstance(reason, Urllib3TimeoutError) and not isinstance(reason, NewConnectionError)
+
+
+@contextmanager
+def _transport_errors(api_name: str) -> Iterator[None]:
+    """Traduz falhas de transporte do urllib3 (envio ou leitura do corpo) em MelhorEnvioAPIError."""
+    try:
+        yield
+    except MaxRetryError as e:
+        if _is_timeout(e.reason):
+            raise MelhorEnvioAPIError(f"Timeout ao conectar na {api_name}") from e
+        raise MelhorEnvioAPIError(f"Falha de conexão com a {api_name}") from e
+    except (Urllib3TimeoutError, TimeoutError) as e:
+        raise MelhorEnvioAPIError(f"Timeout ao conectar na {api_name}") from e
+    except (Urllib3HTTPError, OSError) as e:
+        raise MelhorEnvioAPIError(f"Falha de conexão com a {api_name}") from e
+
+
+def _send(method: str, url: str, data: bytes | None, api_name: str, **kwargs: Any) -> Any:
+    """
+    Envia pelo pool com os headers em cache; corpo já em bytes (dumps_bytes).
+
+    Traduz falhas de transporte em MelhorEnvioAPIError; o status HTTP fica com o chamador.
+    A resposta vem sem corpo pré-carregado: o chamador lê com ``_read_body``.
+    """
+    with _transport_errors(api_name):
+        return _http.request(
+            method, url, body=data, headers=_headers(), preload_content=False, **kwargs
+        )
+
+
+def _read_body(resp: Any, api_name: str, limit: int | None = None) -> bytes:
+    """
+    Lê o corpo e devolve a conexão ao pool.
+
+    Com ``limit`` (respostas de erro) lê só o começo e fecha a conexão em vez de
+    baixar o resto; sem ``limit`` lê tudo e a conexão é reaproveitada (keep-alive).
+    Timeout ou queda no meio do corpo também vira MelhorEnvioAPIError.
+    """
+    try:
+        with _transport_errors(api_name):
+            if limit is None:
+                return resp.data
+            raw = resp.read(limit)
+            resp.close()
+            return raw
+    finally:
+        resp.release_conn()
+
+
+# Default compartilhado para "company" ausente (somente leitura)
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
 def _parse_quote_option(entry: dict[str, Any]) -> dict[str, Any] | None:
-    name = (
-        entry.get("name")
-        or (entry.get("company") or {}).get("name")
-        or entry.get("company_name")
-        or "Transportadora"
-    )
-    value = entry.get("price")
+    get = entry.get
+    value = get("price")
     if value is None:
         return None
     try:
         price_float = float(value)
     except (TypeError, ValueError):
         return None
-    delivery = (
-        entry.get("delivery_time")
-        or entry.get("delivery_time_min")
-        or entry.get("custom_delivery_time")
-    )
+    company = get("company") or _EMPTY
+    name = get("name") or company.get("name") or get("company_name") or "Transportadora"
+    delivery = get("delivery_time") or get("delivery_time_min") or get("custom_delivery_time")
     try:
         days = int(delivery) if delivery is not None else None
     except (TypeError, ValueError):
         days = None
-    service_id = (
-        entry.get("service")
-        or (entry.get("company") or {}).get("id")
-        or (entry.get("company") or {}).get("code")
-        or entry.get("id")
-    )
+    service_id = get("service") or company.get("id") or company.get("code") or get("id")
     service = str(service_id).strip() if service_id is not None else None
     return {
         "transportadora": name,
@@ -72,40 +199,50 @@ def _parse_quote_option(entry: dict[str, Any]) -> dict[str, Any] | None:
     }
 
 
-def _parse_response(body: dict[str, Any]) -> list[dict[str, Any]]:
-    options: list[dict[str, Any]] = []
+# Chaves que podem embrulhar a lista de opções, na ordem de prioridade
+_WRAPPERS = ("id", "packages", "data")
+
+
+def _iter_options(body: Any):
+    """
+    Percorre a resposta uma única vez e produz os dicts candidatos a opção, na ordem da API.
+
+    Formatos aceitos: lista de serviços; dict com id/packages/data (lista de itens com
+    options/services ou o próprio item, ou um dict único); ou o próprio dict como opção.
+    """
     if isinstance(body, list):
-        for item in body:
-            parsed = _parse_quote_option(item if isinstance(item, dict) else {})
-            if parsed:
-                options.append(parsed)
-        return options
+        yield from body
+        return
     if not isinstance(body, dict):
-        return options
-    for key in ("id", "packages", "data"):
-        if key not in body:
-            continue
-        val = body[key]
+        return
+    for key in _WRAPPERS:
+        val = body.get(key)
         if isinstance(val, list):
             for item in val:
-                if isinstance(item, dict):
-                    inner = item.get("options") or item.get("services") or [item]
-                    if not isinstance(inner, list):
-                        inner = [inner]
-                    for opt in inner:
-                        parsed = _parse_quote_option(opt if isinstance(opt, dict) else {})
-                        if parsed:
-                            options.append(parsed)
-            return options
+                if not isinstance(item, dict):
+                    continue
+                inner = item.get("options") or item.get("services") or (item,)
+                yield from inner if isinstance(inner, (list, tuple)) else (inner,)
+            return
         if isinstance(val, dict):
-            parsed = _parse_quote_option(val)
-            if parsed:
-                options.append(parsed)
-            return options
-    parsed = _parse_quote_option(body)
-    if parsed:
-        options.append(parsed)
-    return options
+            yield val
+            return
+    yield body
+
+
+def _parse_response(body: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        parsed
+        for parsed in map(_parse_quote_option, (o for o in _iter_options(body) if isinstance(o, dict)))
+        if parsed
+    ]
+
+
+def _dim_int(val) -> int:
+    """Dimensões em cm como int (já ceil no shipping); evita divergência com Carrinho."""
+    if type(val) is int:
+        return val
+    return int(math.ceil(float(val)))
 
 
 def get_quote(
@@ -121,7 +258,8 @@ def get_quote(
         cep_destino: Destination postal code (8 digits).
         products: List of dicts with width, height, length (cm), weight (kg),
                   quantity, and optional insurance_value (default 1). Optional "id" per product.
-        timeout_sec: Timeout HTTP (segundos). Padrão ``REQUEST_TIMEOUT_SEC``. Pagamento deve usar valor
+        timeout_sec: Timeout HTTP (segundos). Padrão: ``QUOTE_ATTEMPT_TIMEOUT_SEC`` por tentativa, com retry
+            de 429/5xx e falhas de conexão (timeout de leitura não é retentado). Pagamento deve usar valor
             menor para caber no teto ~30s do API Gateway HTTP + MP + Supabase + Firebase.
 
     Returns:
@@ -130,36 +268,22 @@ def get_quote(
     Raises:
         MelhorEnvioAPIError: On missing env, connection/timeout or API error.
     """
-    http_timeout = float(timeout_sec) if timeout_sec is not None else float(REQUEST_TIMEOUT_SEC)
-    base = (os.environ.get("MELHOR_ENVIO_API_URL") or DEFAULT_API_BASE).rstrip("/")
-    url = f"{base}{CALCULATE_PATH}"
-    token = _env("MELHOR_ENVIO_TOKEN", "")
+    url = _url(CALCULATE_PATH)
+    _env("MELHOR_ENVIO_TOKEN", "")
     cep_origem = _env("CEP_ORIGEM", "")
 
-    def _dim_int(val) -> int:
-        """Dimensões em cm como int (já ceil no shipping); evita divergência com Carrinho."""
-        if isinstance(val, int) and not isinstance(val, bool):
-            return val
-        return int(math.ceil(float(val)))
-
-    def _weight_3(val) -> float:
-        """Peso em kg com no máximo 3 casas decimais (Melhor Envio)."""
-        return round(float(val), 3)
-
-    def _money_2(val) -> float:
-        return round(float(val), 2)
-
-    payload_products = []
-    for i, p in enumerate(products, start=1):
-        payload_products.append({
+    payload_products = [
+        {
             "id": str(p.get("id", i)),
             "width": _dim_int(p["width"]),
             "height": _dim_int(p["height"]),
             "length": _dim_int(p["length"]),
-            "weight": _weight_3(p["weight"]),
+            "weight": round(float(p["weight"]), 3),  # kg, no máximo 3 casas (Melhor Envio)
             "quantity": int(p.get("quantity", 1)),
-            "insurance_value": _money_2(p.get("insurance_value", 1)),
-        })
+            "insurance_value": round(float(p.get("insurance_value", 1)), 2),
+        }
+        for i, p in enumerate(products, start=1)
+    ]
 
     body = {
         "from": {"postal_code": cep_origem},
@@ -167,43 +291,34 @@ def get_quote(
         "products": payload_products,
         "options": {"receipt": False, "own_hand": False},
     }
-    data = json.dumps(body).encode("utf-8")
-
-    req = urllib.request.Request(
+    if timeout_sec is None:
+        # Retry próprio (429/5xx e conexão) com teto por tentativa: o total cabe no API Gateway
+        request_kwargs: dict[str, Any] = {"timeout": _QUOTE_RETRY_TIMEOUT, "retries": _QUOTE_RETRY}
+    else:
+        # Orçamento apertado (ex.: pagamento): uma única tentativa, sem retry nem de conexão
+        http_timeout = float(timeout_sec)
+        request_kwargs = {
+            "timeout": urllib3.Timeout(connect=min(CONNECT_TIMEOUT_SEC, http_timeout), read=http_timeout),
+            "retries": False,
+        }
+    resp = _send(
+        "POST",
         url,
-        data=data,
-        method="POST",
-        headers={
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "Authorization": f"Bearer {token}",
-        },
+        dumps_bytes(body),
+        "API de frete",
+        **request_kwargs,
     )
 
-    try:
-        with urllib.request.urlopen(
-            req, timeout=http_timeout, context=ssl.create_default_context()
-        ) as resp:
-            if resp.status != 200:
-                raw = resp.read().decode("utf-8", errors="replace")
-                raise MelhorEnvioAPIError(f"API retornou status {resp.status}")
-            raw = resp.read().decode("utf-8", errors="replace")
-    except urllib.error.HTTPError as e:
-        raw = e.read().decode("utf-8", errors="replace") if e.fp else ""
-        raise MelhorEnvioAPIError(f"API retornou erro HTTP {e.code}") from e
-    except urllib.error.URLError as e:
-        reason = getattr(e, "reason", None)
-        if isinstance(reason, TimeoutError) or (reason and "timed out" in str(reason).lower()):
-            raise MelhorEnvioAPIError("Timeout ao conectar na API de frete") from e
-        raise MelhorEnvioAPIError("Falha de conexão com a API de frete") from e
-    except TimeoutError as e:
-        raise MelhorEnvioAPIError("Timeout ao conectar na API de frete") from e
-    except OSError as e:
-        raise MelhorEnvioAPIError("Falha de conexão com a API de frete") from e
+    if resp.status != 200:
+        _read_body(resp, "API de frete", limit=0)  # corpo de erro não é usado: só libera a conexão
+        if resp.status >= 400:
+            raise MelhorEnvioAPIError(f"API retornou erro HTTP {resp.status}")
+        raise MelhorEnvioAPIError(f"API retornou status {resp.status}")
+    raw = _read_body(resp, "API de frete")
 
     try:
-        parsed_body = json.loads(raw)
-    except json.JSONDecodeError as e:
+        parsed_body = loads(raw)
+    except ValueError as e:
         raise MelhorEnvioAPIError("Resposta inválida da API de frete") from e
 
     return _parse_response(parsed_body)
@@ -219,44 +334,21 @@ def _api_request(path: str, method: str = "POST", body: dict | None = None) -> d
     Raises:
         MelhorEnvioAPIError: On connection/timeout or API error.
     """
-    base = (os.environ.get("MELHOR_ENVIO_API_URL") or DEFAULT_API_BASE).rstrip("/")
-    url = f"{base}{path}"
-    token = _env("MELHOR_ENVIO_TOKEN", "")
-
-    data = json.dumps(body).encode("utf-8") if body else None
+    url = _url(path)
 
-    req = urllib.request.Request(
-        url,
-        data=data,
-        method=method,
-        headers={
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "Authorization": f"Bearer {token}",
-        },
+    resp = _send(
+        method, url, dumps_bytes(body) if body else None, "API Melhor Envio", retries=_API_RETRY
     )
 
-    try:
-        with urllib.request.urlopen(
-            req, timeout=REQUEST_TIMEOUT_SEC, context=ssl.create_default_context()
-        ) as resp:
-            raw = resp.read().decode("utf-8", errors="replace")
-    except urllib.error.HTTPError as e:
-        raw = e.read().decode("utf-8", errors="replace") if e.fp else ""
-        raise MelhorEnvioAPIError(f"API retornou erro HTTP {e.code}: {raw}") from e
-    except urllib.error.URLError as e:
-        reason = getattr(e, "reason", None)
-        if isinstance(reason, TimeoutError) or (reason and "timed out" in str(reason).lower()):
-            raise MelhorEnvioAPIError("Timeout ao conectar na API Melhor Envio") from e
-        raise MelhorEnvioAPIError("Falha de conexão com a API Melhor Envio") from e
-    except TimeoutError as e:
-        raise MelhorEnvioAPIError("Timeout ao conectar na API Melhor Envio") from e
-    except OSError as e:
-        raise MelhorEnvioAPIError("Falha de conexão com a API Melhor Envio") from e
+    if resp.status >= 400:
+        raw = _read_body(resp, "API Melhor Envio", limit=ERROR_BODY_MAX_BYTES)
+        text = raw.decode("utf-8", errors="replace") if raw else ""
+        raise MelhorEnvioAPIError(f"API retornou erro HTTP {resp.status}: {text}")
+    raw = _read_body(resp, "API Melhor Envio")
 
     try:
-        return json.loads(raw) if raw else {}
-    except json.JSONDecodeError as e:
+        return loads(raw) if raw else {}
+    except ValueError as e:
         raise MelhorEnvioAPIError("Resposta inválida da API Melhor Envio") from e
 
 
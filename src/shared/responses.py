@@ -1,24 +1,38 @@
-import json
 from decimal import Decimal
 from datetime import datetime, date
+from types import MappingProxyType
 
+from shared.fastjson import dumps
 
-class DecimalEncoder(json.JSONEncoder):
-    """
-    Custom JSON encoder that handles Decimal, datetime, and date objects.
-    
-    Converts:
-    - Decimal to float (or int if no decimal places)
-    - datetime/date to ISO 8601 string
-    """
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            if obj % 1 == 0:
-                return int(obj)
-            return float(obj)
-        elif isinstance(obj, (datetime, date)):
-            return obj.isoformat()
-        return super().default(obj)
+
+def _decimal_to_number(obj: Decimal):
+    # Expoente >= 0 é inteiro pela própria representação (sem o módulo "% 1", que aloca um Decimal).
+    # NaN/Infinity têm expoente não numérico ('n', 'N', 'F') e seguem para float.
+    exponent = obj.as_tuple().exponent
+    if type(exponent) is int and exponent >= 0:
+        return int(obj)
+    return float(obj)
+
+
+# Conversão por tipo exato: uma busca em dict no lugar da cadeia de isinstance
+_CONVERTERS = {
+    Decimal: _decimal_to_number,
+    datetime: datetime.isoformat,
+    date: date.isoformat,
+}
+# Subclasses (ex.: pendulum.DateTime) caem no isinstance; datetime antes de date (é subclasse dela)
+_SUBCLASS_CONVERTERS = tuple(_CONVERTERS.items())
+
+
+def _json_default(obj):
+    """Tipos que o backend JSON não serializa nativamente (orjson só chega aqui com Decimal)."""
+    converter = _CONVERTERS.get(type(obj))
+    if converter is not None:
+        return converter(obj)
+    for base, converter in _SUBCLASS_CONVERTERS:
+        if isinstance(obj, base):
+            return converter(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 
 CORS_HEADERS = {
@@ -28,12 +42,29 @@ CORS_HEADERS = {
     "Access-Control-Expose-Headers": "*",
 }
 
+# Montados uma vez no import, somente leitura; cada resposta leva a sua cópia (dict simples,
+# serializável pelo runtime), para um handler que altere headers não vazar para as próximas.
+_RESPONSE_HEADERS = MappingProxyType({"Content-Type": "application/json", **CORS_HEADERS})
+
+_OPTIONS_HEADERS = MappingProxyType({
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+    "Access-Control-Allow-Headers": "*",
+    "Access-Control-Max-Age": "86400",
+})
+
+
 def http_response(status_code: int, body: dict) -> dict:
-    headers = {"Content-Type": "application/json", **CORS_HEADERS}
+    """
+    Resposta JSON do API Gateway (HTTP API v2) com headers CORS.
+
+    O body vai como str UTF-8, sem isBase64Encoded: o decode dos bytes do orjson é uma
+    cópia em C, enquanto base64 aumentaria o payload em ~33% (limite de 6 MB da Lambda).
+    """
     return {
         "statusCode": status_code,
-        "headers": headers,
-        "body": json.dumps(body, cls=DecimalEncoder)
+        "headers": dict(_RESPONSE_HEADERS),
+        "body": dumps(body, default=_json_default)
     }
 
 
@@ -42,13 +73,4 @@ def options_response() -> dict:
     Resposta para preflight CORS. 204 + Allow-Headers * evita bloqueio
     quando o front envia headers não listados (Accept, etc.).
     """
-    return {
-        "statusCode": 204,
-        "headers": {
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-            "Access-Control-Allow-Headers": "*",
-            "Access-Control-Max-Age": "86400",
-        },
-        "body": ""
-    }
\ No newline at end of file
+    return {"statusCode": 204, "headers": dict(_OPTIONS_HEADERS), "body": ""}
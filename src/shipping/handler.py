@@ -5,31 +5,38 @@ POST body: { "cep_destino": "01310100", "itens": [ { "width": 11, "height": 17,
 Response: { "opcoes": [ { "transportadora": "...", "preco": 25.90, "prazo_entrega_dias": 8, "service": "jadlog_package" } ] }
 """
 
-import json
+import base64
+
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.parser import parse
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+from shared.fastjson import loads
 from shared.responses import http_response
 from schemas import FreightQuoteInput
 from service import MelhorEnvioAPIError, quote_freight
 
 logger = Logger(service="shipping")
 
+# Respostas constantes serializadas uma vez no import
+_OPTIONS_OK = http_response(200, {})
+_METHOD_NOT_ALLOWED = http_response(405, {"error": "Método não permitido. Use POST."})
+_BODY_REQUIRED = http_response(400, {"error": "Body JSON obrigatório com cep_destino e itens"})
+
 
 @logger.inject_lambda_context
 def lambda_handler(event: dict, context: LambdaContext) -> dict:
     method = event.get("requestContext", {}).get("http", {}).get("method")
 
     if method == "OPTIONS":
-        return http_response(200, {})
+        return _OPTIONS_OK
 
     if method != "POST":
-        return http_response(405, {"error": "Método não permitido. Use POST."})
+        return _METHOD_NOT_ALLOWED
 
     body = _body_json(event)
     if not body:
-        return http_response(400, {"error": "Body JSON obrigatório com cep_destino e itens"})
+        return _BODY_REQUIRED
 
     try:
         payload = parse(event=body, model=FreightQuoteInput)
@@ -50,11 +57,18 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
 
 def _body_json(event: dict) -> dict:
     body = event.get("body")
-    if body is None:
-        return {}
-    if isinstance(body, str):
+    body_type = type(body)
+    if body_type is dict:
+        # Invocação direta / integração com mapping template: já vem como dict
+        return body
+    if body_type is str:
+        if not body:
+            return {}
         try:
-            return json.loads(body) if body else {}
-        except json.JSONDecodeError:
+            if event.get("isBase64Encoded"):
+                # Decodifica direto para bytes; orjson/json aceitam bytes sem str intermediária
+                return loads(base64.b64decode(body))
+            return loads(body)
+        except ValueError:
             return {}
-    return body if isinstance(body, dict) else {}
+    return {}
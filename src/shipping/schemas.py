@@ -6,15 +6,21 @@ divergência de preços entre cotação e checkout.
 """
 
 import math
+import re
 from decimal import Decimal
 from typing import List
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_serializer, field_validator
+
+_NON_DIGIT = re.compile(r"\D+")
 
 
 def _normalize_cep(v: str) -> str:
     """Strip non-digits and validate length."""
-    digits = "".join(c for c in str(v).strip() if c.isdigit())
+    raw = str(v).strip()
+    if len(raw) == 8 and raw.isdigit():
+        return raw
+    digits = _NON_DIGIT.sub("", raw)
     if len(digits) != 8:
         raise ValueError("CEP deve conter 8 dígitos")
     return digits
@@ -61,6 +67,11 @@ class ShippingItemInput(BaseModel):
         """Peso em kg com no máximo 3 casas decimais (padrão Melhor Envio)."""
         return v.quantize(Decimal("0.001"))
 
+    @field_serializer("weight", "insurance_value")
+    def decimal_as_float(self, v: Decimal) -> float:
+        """model_dump já sai no formato do payload da API (float no JSON)."""
+        return float(v)
+
 
 class FreightQuoteInput(BaseModel):
     """Input for freight quote: destination CEP and list of items."""
@@ -4,8 +4,16 @@ Freight quote service: integrates with Melhor Envio API for shipping calculation
 All CEPs are quoted via the external API; no local rules or region conditionals.
 Products montados com tipos alinhados ao Carrinho: int (cm) nas dimensões,
 peso com 3 casas decimais (float no payload JSON da API).
+Cotações repetidas (mesmo CEP + itens) são servidas de um cache em memória por QUOTE_TTL_SEC.
+
+Expects env: MELHOR_ENVIO_TOKEN, CEP_ORIGEM; optional MELHOR_ENVIO_API_URL,
+QUOTE_TTL_SEC (segundos de cache da cotação; padrão 30, 0 desliga).
 """
 
+import os
+import time
+from collections import OrderedDict
+
 from aws_lambda_powertools import Logger
 
 from shared.melhor_envio import MelhorEnvioAPIError, get_quote
@@ -15,11 +23,24 @@ __all__ = ["MelhorEnvioAPIError", "quote_freight"]
 
 logger = Logger(service="shipping")
 
+# Cache curto por container: o carrinho re-cota o mesmo CEP + itens várias vezes em segundos.
+# Chave -> (expira_em monotonic, opções). Só respostas de sucesso entram; LRU limitado a _QUOTE_CACHE_MAX.
+# TTL curto: o pagamento re-cota ao vivo e pede "Recalcule o frete" se o preço mudou; um cache
+# longo devolveria o mesmo preço velho a cada recálculo.
+_QUOTE_CACHE: "OrderedDict[tuple, tuple[float, list[dict]]]" = OrderedDict()
+_QUOTE_TTL_SEC = float(os.environ.get("QUOTE_TTL_SEC", "30"))
+_QUOTE_CACHE_MAX = 512
 
-def _weight_for_api(weight) -> float:
-    """Peso em kg com até 3 casas decimais, formato esperado pelo calculate/carrinho."""
-    # Decimal nativo do schema já quantizado; float garante JSON serializável idêntico ao round(..., 3) no cliente
-    return float(weight)
+
+def _cache_key(payload_input: FreightQuoteInput) -> tuple:
+    """CEP + itens já normalizados pelo schema (int/Decimal: hasheáveis e estáveis)."""
+    return (
+        payload_input.cep_destino,
+        tuple(
+            (it.width, it.height, it.length, it.weight, it.quantity, it.insurance_value)
+            for it in payload_input.itens
+        ),
+    )
 
 
 def quote_freight(payload_input: FreightQuoteInput) -> list[dict]:
@@ -32,16 +53,24 @@ def quote_freight(payload_input: FreightQuoteInput) -> list[dict]:
     Raises:
         MelhorEnvioAPIError: On missing env, connection/timeout or API error.
     """
+    key = _cache_key(payload_input)
+    now = time.monotonic()
+    hit = _QUOTE_CACHE.get(key)
+    if hit is not None:
+        if hit[0] > now:
+            _QUOTE_CACHE.move_to_end(key)
+            return [dict(o) for o in hit[1]]
+        del _QUOTE_CACHE[key]
+
+    # model_dump (pydantic-core) já entrega width/height/length/weight/quantity/insurance_value
+    # com os nomes e tipos do payload da API
     products = [
-        {
-            "id": str(i),
-            "width": int(item.width),
-            "height": int(item.height),
-            "length": int(item.length),
-            "weight": _weight_for_api(item.weight),
-            "quantity": int(item.quantity),
-            "insurance_value": float(item.insurance_value),
-        }
+        dict(item.model_dump(), id=str(i))
         for i, item in enumerate(payload_input.itens, start=1)
     ]
-    return get_quote(payload_input.cep_destino, products)
+    options = get_quote(payload_input.cep_destino, products)
+    if _QUOTE_TTL_SEC > 0:
+        _QUOTE_CACHE[key] = (now + _QUOTE_TTL_SEC, [dict(o) for o in options])
+        if len(_QUOTE_CACHE) > _QUOTE_CACHE_MAX:
+            _QUOTE_CACHE.popitem(last=False)
+    return options
@@ -1,5 +1,7 @@
 """Handler: disparado por EventBridge (cron diário meia-noite UTC)."""
 
+from functools import lru_cache
+
 from aws_lambda_powertools import Logger
 
 from service import CleanupOrphanImagesService
@@ -7,12 +9,17 @@ from service import CleanupOrphanImagesService
 logger = Logger(service="cleanup-orphan-images")
 
 
+@lru_cache(maxsize=1)
+def _get_service() -> CleanupOrphanImagesService:
+    """Service (e repository/cliente Supabase) reaproveitado entre invocações quentes."""
+    return CleanupOrphanImagesService()
+
+
 @logger.inject_lambda_context
 def lambda_handler(event, context):
     """Executa limpeza de imagens órfãs no bucket product-images."""
     try:
-        service = CleanupOrphanImagesService()
-        result = service.run()
+        result = _get_service().run()
         logger.info("Cleanup concluído", extra=result)
         return {"statusCode": 200, "body": result}
     except Exception as e:
@@ -1,69 +1,145 @@
 """Repository: acesso ao Supabase para produtos e Storage."""
 
-from typing import List, Set
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Set, Tuple
 
 from aws_lambda_powertools import Logger
 from shared.database import get_supabase_client
 
 logger = Logger(service="cleanup-orphan-images")
 
+# Quantidade de paths por chamada de remove() no Storage
+REMOVE_BATCH_SIZE = 1000
+# Máximo de paths com falha incluídos no log de resumo
+FAILED_LOG_SAMPLE = 20
+# Pastas listadas em paralelo por nível (cliente HTTP do supabase é thread-safe)
+LIST_MAX_WORKERS = 16
+# Linhas de products por página na leitura das imagens referenciadas.
+# Não passar do max_rows do PostgREST (padrão 1000): o servidor corta a página sem avisar.
+PRODUCTS_PAGE_SIZE = 1000
+
 
 class CleanupOrphanImagesRepository:
     """Consulta produtos e gerencia Storage para limpeza de imagens órfãs."""
 
     BUCKET = "product-images"
+    # Greedy: captura o que vem depois da última ocorrência de '<bucket>/', sem querystring
+    _BUCKET_PATH_RE = re.compile(rf".*{re.escape(BUCKET)}/([^?]*)")
 
     def __init__(self) -> None:
         self.db = get_supabase_client()
 
-    def get_referenced_image_paths(self) -> Set[str]:
-        """Retorna set de paths de imagens referenciadas em products (image e images)."""
-        res = self.db.table("products").select("image, images").execute()
-        paths: Set[str] = set()
-        for row in res.data or []:
-            if row.get("image"):
-                paths.add(self._normalize_path(row["image"]))
-            for img in row.get("images") or []:
-                if img:
-                    paths.add(self._normalize_path(img))
-        return paths
+    def get_referenced_image_basenames(self) -> Set[str]:
+        """
+        Retorna set de basenames (ex: '1770xxx.jpg') das imagens referenciadas em products (image e images).
+
+        Lê a tabela por keyset (id > último id lido, ordenado por id) até vir uma página vazia.
+        Uma página menor que o pedido não encerra a leitura (o servidor pode limitar as linhas),
+        e produtos removidos durante a execução não deslocam as páginas seguintes como no offset.
+        """
+        basenames: Set[str] = set()
+        add = basenames.add
+        basename = self._basename
+        last_id = None
+        while True:
+            query = self.db.table("products").select("id,image,images")
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.order("id").limit(PRODUCTS_PAGE_SIZE).execute().data or []
+            if not rows:
+                return basenames
+            for row in rows:
+                if row.get("image"):
+                    add(basename(row["image"]))
+                for img in row.get("images") or []:
+                    if img:
+                        add(basename(img))
+            last_id = rows[-1]["id"]
+
+    def _basename(self, value: str) -> str:
+        """Último segmento do path normalizado (é por ele que o Storage é comparado)."""
+        return self._normalize_path(value).rpartition("/")[2]
 
     def _normalize_path(self, value: str) -> str:
         """Extrai o path relativo ao bucket (ex: '1770xxx.jpg') de URL ou path completo."""
         if not value:
             return ""
-        if self.BUCKET in value:
-            return value.split(f"{self.BUCKET}/")[-1].split("?")[0]
-        return value.split("/")[-1].split("?")[0] if "/" in value else value
+        match = self._BUCKET_PATH_RE.match(value)
+        if match:
+            return match.group(1)
+        if "/" not in value:
+            return value
+        return value.rpartition("/")[2].partition("?")[0]
+
+    def _list_prefix(self, prefix: str) -> Tuple[List[str], List[str]]:
+        """Lista uma pasta: retorna (arquivos, subpastas com '/' final)."""
+        files: List[str] = []
+        folders: List[str] = []
+        items = self.db.storage.from_(self.BUCKET).list(prefix) or []
+        for item in items:
+            name = item.get("name", "")
+            if not name or name == ".emptyFolderPlaceholder":
+                continue
+            full_path = f"{prefix}{name}" if prefix else name
+            if item.get("id") is not None:
+                files.append(full_path)
+            else:
+                folders.append(f"{full_path}/")
+        return files, folders
 
     def list_storage_paths(self) -> List[str]:
-        """Lista paths de arquivos no bucket product-images (raiz e subpastas recursivo)."""
-        paths: List[str] = []
+        """
+        Lista paths de arquivos no bucket product-images (raiz e subpastas recursivo).
 
-        def _list_recursive(prefix: str) -> None:
-            items = self.db.storage.from_(self.BUCKET).list(prefix) or []
-            for item in items:
-                name = item.get("name", "")
-                if not name or name == ".emptyFolderPlaceholder":
-                    continue
-                full_path = f"{prefix}{name}" if prefix else name
-                if item.get("id") is not None:
-                    paths.append(full_path)
-                else:
-                    _list_recursive(f"{full_path}/")
-
-        _list_recursive("")
+        Percorre por nível (BFS) com uma worklist iterativa, sem recursão: as pastas de um
+        mesmo nível são listadas em paralelo.
+        """
+        paths: List[str] = []
+        pending = [""]
+        with ThreadPoolExecutor(max_workers=LIST_MAX_WORKERS) as executor:
+            while pending:
+                next_level: List[str] = []
+                # Uma pasta só (ex.: raiz) não compensa o hop para a thread
+                mapper = map if len(pending) == 1 else executor.map
+                for files, folders in mapper(self._list_prefix, pending):
+                    paths.extend(files)
+                    next_level.extend(folders)
+                pending = next_level
         return paths
 
     def delete_storage_files(self, paths: List[str]) -> int:
-        """Remove arquivos do Storage pelo path. Retorna quantidade deletada com sucesso."""
+        """
+        Remove arquivos do Storage pelo path. Retorna quantidade deletada com sucesso.
+
+        Envia em lotes (uma requisição por REMOVE_BATCH_SIZE paths); se um lote falhar,
+        refaz só esse lote arquivo a arquivo para isolar o erro.
+        """
         if not paths:
             return 0
+        bucket = self.db.storage.from_(self.BUCKET)
         deleted = 0
-        for path in paths:
+        failed: List[str] = []
+        last_error = ""
+        for start in range(0, len(paths), REMOVE_BATCH_SIZE):
+            chunk = paths[start:start + REMOVE_BATCH_SIZE]
             try:
-                self.db.storage.from_(self.BUCKET).remove([path])
-                deleted += 1
+                bucket.remove(chunk)
+                deleted += len(chunk)
+                continue
             except Exception as e:
-                logger.warning("Falha ao deletar", extra={"path": path, "error": str(e)})
+                logger.warning("Falha ao deletar lote; tentando por arquivo", extra={"size": len(chunk), "error": str(e)})
+            for path in chunk:
+                try:
+                    bucket.remove([path])
+                    deleted += 1
+                except Exception as e:
+                    failed.append(path)
+                    last_error = str(e)
+        if failed:
+            # Um único log com contagem + amostra (evita um warning por arquivo numa falha geral)
+            logger.warning(
+                "Falhas ao deletar",
+                extra={"failed_count": len(failed), "sample": failed[:FAILED_LOG_SAMPLE], "error": last_error},
+            )
         return deleted
@@ -1,5 +1,6 @@
 """Service: lógica de limpeza de imagens órfãs."""
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
 
 from aws_lambda_powertools import Logger
@@ -16,10 +17,15 @@ class CleanupOrphanImagesService:
 
     def run(self) -> Dict[str, Any]:
         """Executa a limpeza e retorna resumo (deleted_count, errors)."""
-        referenced = self.repo.get_referenced_image_paths()
-        storage_paths = self.repo.list_storage_paths()
-        referenced_basenames = {p.split("/")[-1] for p in referenced if p}
-        orphans = [p for p in storage_paths if p.split("/")[-1] not in referenced_basenames]
+        # Postgres e Storage são independentes: consulta os dois em paralelo
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            f_referenced = executor.submit(self.repo.get_referenced_image_basenames)
+            f_storage = executor.submit(self.repo.list_storage_paths)
+            referenced_basenames = f_referenced.result()
+            storage_paths = f_storage.result()
+        # Órfã: basename fora das referências; mantém a ordem da listagem do Storage
+        # (rpartition: um único corte a partir da direita, sem lista intermediária)
+        orphans = [p for p in storage_paths if p.rpartition("/")[2] not in referenced_basenames]
         if not orphans:
             return {"deleted_count": 0, "orphans_found": 0}
         logger.info("Orphans a deletar", extra={"paths": orphans})
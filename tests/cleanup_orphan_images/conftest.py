@@ -0,0 +1,11 @@
+import sys
+from pathlib import Path
+
+# Lambda imports use sibling modules (repository, service); need the trigger dir on path.
+_root = Path(__file__).resolve().parents[2]
+trigger_path = str(_root / "src" / "triggers" / "cleanup_orphan_images")
+src_path = str(_root / "src")
+for path in [trigger_path, src_path]:
+    if path in sys.path:
+        sys.path.remove(path)
+    sys.path.insert(0, path)
@@ -0,0 +1,168 @@
+"""Unit tests for cleanup orphan images repository."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.triggers.cleanup_orphan_images import repository as repo_module
+from src.triggers.cleanup_orphan_images.repository import CleanupOrphanImagesRepository
+
+
+@pytest.fixture
+def mock_db():
+    """Mock Supabase client; storage.from_(bucket) devolve sempre o mesmo bucket mock."""
+    with patch("src.triggers.cleanup_orphan_images.repository.get_supabase_client") as mock_get:
+        client = MagicMock()
+        mock_get.return_value = client
+        yield client
+
+
+class TestNormalizePath:
+    """_normalize_path: URL pública, path com pasta ou nome simples."""
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("https://x.supabase.co/storage/v1/object/public/product-images/a.jpg?t=1", "a.jpg"),
+            ("https://x.supabase.co/storage/v1/object/public/product-images/old/a.jpg", "old/a.jpg"),
+            ("https://cdn.example.com/img/b.png?v=2", "b.png"),
+            ("c.jpg", "c.jpg"),
+            ("", ""),
+        ],
+    )
+    def test_normalize(self, mock_db: MagicMock, value: str, expected: str) -> None:
+        assert CleanupOrphanImagesRepository()._normalize_path(value) == expected
+
+
+class _FakeProductsQuery:
+    """Query de products em memória: aplica gt/order/limit e corta em ``max_rows`` como o PostgREST."""
+
+    def __init__(self, rows: list, max_rows: int) -> None:
+        self._rows = rows
+        self._max_rows = max_rows
+        self._after = None
+        self._limit = None
+        self.calls: list = []
+
+    def gt(self, column: str, value):
+        assert column == "id"
+        self._after = value
+        return self
+
+    def order(self, column: str):
+        assert column == "id"
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def execute(self) -> MagicMock:
+        self.calls.append((self._after, self._limit))
+        rows = sorted((r for r in self._rows if self._after is None or r["id"] > self._after), key=lambda r: r["id"])
+        data = rows[: min(self._limit, self._max_rows)]
+        self._after = self._limit = None
+        return MagicMock(data=data)
+
+
+class TestGetReferencedImageBasenames:
+    """get_referenced_image_basenames: pagina products por id e reduz image/images ao basename."""
+
+    def _wire(self, mock_db: MagicMock, rows: list, max_rows: int) -> _FakeProductsQuery:
+        query = _FakeProductsQuery(rows, max_rows)
+        mock_db.table.return_value.select.return_value = query
+        return query
+
+    def test_reads_all_pages(self, mock_db: MagicMock) -> None:
+        query = self._wire(
+            mock_db,
+            [
+                {"id": 1, "image": "https://x/storage/v1/object/public/product-images/old/a.jpg", "images": None},
+                {"id": 5, "image": None, "images": ["old/b.jpg?t=1", ""]},
+            ],
+            max_rows=1000,
+        )
+
+        with patch.object(repo_module, "PRODUCTS_PAGE_SIZE", 1):
+            basenames = CleanupOrphanImagesRepository().get_referenced_image_basenames()
+
+        assert basenames == {"a.jpg", "b.jpg"}
+        assert query.calls == [(None, 1), (1, 1), (5, 1)]
+
+    def test_server_capped_pages_do_not_stop_early(self, mock_db: MagicMock) -> None:
+        """Servidor devolve menos linhas que o pedido (max_rows): continua até a página vazia."""
+        rows = [{"id": i, "image": f"{i}.jpg", "images": []} for i in range(1, 8)]
+        query = self._wire(mock_db, rows, max_rows=3)
+
+        with patch.object(repo_module, "PRODUCTS_PAGE_SIZE", 5):
+            basenames = CleanupOrphanImagesRepository().get_referenced_image_basenames()
+
+        assert basenames == {f"{i}.jpg" for i in range(1, 8)}
+        assert query.calls == [(None, 5), (3, 5), (6, 5), (7, 5)]
+
+    def test_page_size_within_postgrest_default_max_rows(self) -> None:
+        assert repo_module.PRODUCTS_PAGE_SIZE <= 1000
+
+
+class TestListStoragePaths:
+    """list_storage_paths: percorre subpastas e ignora placeholders."""
+
+    def test_lists_files_from_nested_folders(self, mock_db: MagicMock) -> None:
+        tree = {
+            "": [
+                {"name": "root.jpg", "id": "1"},
+                {"name": "a", "id": None},
+                {"name": "b", "id": None},
+                {"name": ".emptyFolderPlaceholder", "id": "x"},
+            ],
+            "a/": [{"name": "a1.jpg", "id": "2"}, {"name": "deep", "id": None}],
+            "a/deep/": [{"name": "d.jpg", "id": "3"}],
+            "b/": [],
+        }
+        mock_db.storage.from_.return_value.list.side_effect = lambda prefix: tree[prefix]
+
+        paths = CleanupOrphanImagesRepository().list_storage_paths()
+
+        assert sorted(paths) == ["a/a1.jpg", "a/deep/d.jpg", "root.jpg"]
+
+
+class TestDeleteStorageFiles:
+    """delete_storage_files: remove em lotes, com fallback por arquivo no lote que falhar."""
+
+    def test_empty_list_makes_no_calls(self, mock_db: MagicMock) -> None:
+        assert CleanupOrphanImagesRepository().delete_storage_files([]) == 0
+        mock_db.storage.from_.return_value.remove.assert_not_called()
+
+    def test_removes_in_batches(self, mock_db: MagicMock) -> None:
+        bucket = mock_db.storage.from_.return_value
+        paths = [f"{i}.jpg" for i in range(5)]
+        with patch.object(repo_module, "REMOVE_BATCH_SIZE", 2):
+            deleted = CleanupOrphanImagesRepository().delete_storage_files(paths)
+        assert deleted == 5
+        assert [c.args[0] for c in bucket.remove.call_args_list] == [
+            ["0.jpg", "1.jpg"], ["2.jpg", "3.jpg"], ["4.jpg"],
+        ]
+
+    def test_failed_batch_falls_back_to_single_files(self, mock_db: MagicMock) -> None:
+        bucket = mock_db.storage.from_.return_value
+
+        def remove(chunk):
+            if len(chunk) > 1 or chunk == ["bad.jpg"]:
+                raise RuntimeError("storage error")
+
+        bucket.remove.side_effect = remove
+        deleted = CleanupOrphanImagesRepository().delete_storage_files(["a.jpg", "bad.jpg", "c.jpg"])
+        assert deleted == 2
+        assert [c.args[0] for c in bucket.remove.call_args_list] == [
+            ["a.jpg", "bad.jpg", "c.jpg"], ["a.jpg"], ["bad.jpg"], ["c.jpg"],
+        ]
+
+    def test_single_file_failures_are_logged_once(self, mock_db: MagicMock) -> None:
+        mock_db.storage.from_.return_value.remove.side_effect = RuntimeError("storage down")
+        with patch.object(repo_module, "logger") as mock_logger:
+            deleted = CleanupOrphanImagesRepository().delete_storage_files(["a.jpg", "b.jpg"])
+        assert deleted == 0
+        summary = [c for c in mock_logger.warning.call_args_list if c.args[0] == "Falhas ao deletar"]
+        assert len(summary) == 1
+        assert summary[0].kwargs["extra"]["failed_count"] == 2
+        assert summary[0].kwargs["extra"]["sample"] == ["a.jpg", "b.jpg"]
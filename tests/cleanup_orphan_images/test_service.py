@@ -0,0 +1,49 @@
+"""Unit tests for cleanup orphan images service."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.triggers.cleanup_orphan_images.service import CleanupOrphanImagesService
+
+
+@pytest.fixture
+def mock_repo():
+    with patch("src.triggers.cleanup_orphan_images.service.CleanupOrphanImagesRepository") as mock_cls:
+        repo = MagicMock()
+        mock_cls.return_value = repo
+        yield repo
+
+
+class TestRun:
+    """run: cruza imagens referenciadas com o Storage e remove as órfãs."""
+
+    def test_deletes_only_orphans(self, mock_repo: MagicMock) -> None:
+        mock_repo.get_referenced_image_basenames.return_value = {"a.jpg"}
+        mock_repo.list_storage_paths.return_value = ["a.jpg", "old/b.jpg"]
+        mock_repo.delete_storage_files.return_value = 1
+
+        result = CleanupOrphanImagesService().run()
+
+        mock_repo.delete_storage_files.assert_called_once_with(["old/b.jpg"])
+        assert result == {"deleted_count": 1, "orphans_found": 1}
+
+    def test_no_orphans_skips_delete(self, mock_repo: MagicMock) -> None:
+        mock_repo.get_referenced_image_basenames.return_value = {"a.jpg"}
+        mock_repo.list_storage_paths.return_value = ["a.jpg"]
+
+        result = CleanupOrphanImagesService().run()
+
+        mock_repo.delete_storage_files.assert_not_called()
+        assert result == {"deleted_count": 0, "orphans_found": 0}
+
+    def test_orphans_sharing_basename_are_all_deleted(self, mock_repo: MagicMock) -> None:
+        mock_repo.get_referenced_image_basenames.return_value = {"a.jpg"}
+        mock_repo.list_storage_paths.return_value = ["x/dup.jpg", "z/a.jpg", "w/c.jpg", "y/dup.jpg"]
+        mock_repo.delete_storage_files.return_value = 3
+
+        result = CleanupOrphanImagesService().run()
+
+        # Mesma ordem da listagem do Storage (estável entre execuções)
+        mock_repo.delete_storage_files.assert_called_once_with(["x/dup.jpg", "w/c.jpg", "y/dup.jpg"])
+        assert result["orphans_found"] == 3
@@ -1,7 +1,9 @@
 import importlib.util
 import sys
 from pathlib import Path
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
 
 _root = Path(__file__).resolve().parents[2]
 payment_path = str(_root / "src" / "payment")
@@ -31,3 +33,57 @@ for _name, _file in (
         _spec.loader.exec_module(_mod)
         if _name == "exceptions":
             sys.modules["src.payment.exceptions"] = _mod
+
+
+# --- Mocks compartilhados dos testes de PaymentService (auditoria e frete) ---
+# Patchers entram uma vez por módulo de teste; os fixtures por teste só resetam os mocks.
+# Import depois do setup acima (sys.path e shared.firebase falso).
+from src.payment import service as _service_module  # noqa: E402
+
+# Respostas de caminho feliz atribuídas por referência (o service só lê esses dicts)
+_MP_APPROVED = {
+    "status": 201,
+    "response": {"id": "mp-1", "status": "approved", "status_detail": "accredited"},
+}
+_ORDER_OK = {"id": "order-1"}
+
+
+@pytest.fixture(scope="module")
+def _patched_repository():
+    """Patch de PaymentRepository (Mock com spec: só métodos reais existem); yield: a instância."""
+    repo = Mock(spec=_service_module.PaymentRepository)
+    with patch.object(_service_module, "PaymentRepository", return_value=repo):
+        yield repo
+
+
+@pytest.fixture
+def mock_repository(_patched_repository: Mock) -> Mock:
+    """Repositório resetado por teste: sem variante e create_order bem-sucedido por padrão."""
+    _patched_repository.reset_mock(return_value=True, side_effect=True)
+    _patched_repository.get_variant_stock.return_value = None
+    _patched_repository.create_order.return_value = _ORDER_OK
+    return _patched_repository
+
+
+@pytest.fixture(scope="module")
+def _patched_mercadopago():
+    """Patch do SDK do Mercado Pago (import tardio em PaymentService.__init__)."""
+    with patch("mercadopago.SDK") as mock_sdk:
+        with patch("mercadopago.config.RequestOptions", MagicMock):
+            yield mock_sdk
+
+
+@pytest.fixture
+def mock_mercadopago(_patched_mercadopago: MagicMock) -> MagicMock:
+    """SDK mockado com pagamento aprovado por padrão; testes sobrescrevem quando precisam."""
+    # Reseta a instância (não a classe): PaymentService guarda o retorno de SDK() em self.mp
+    inst = _patched_mercadopago.return_value
+    inst.reset_mock(return_value=True, side_effect=True)
+    inst.payment.return_value.create.return_value = _MP_APPROVED
+    return _patched_mercadopago
+
+
+@pytest.fixture(scope="module")
+def service(_patched_repository: Mock, _patched_mercadopago: MagicMock):
+    """PaymentService construído uma vez por módulo sobre os mocks (sem estado entre chamadas)."""
+    return _service_module.PaymentService()
@@ -1,30 +1,67 @@
-import json
 import pytest
 from unittest.mock import patch, MagicMock
 
+import service as payment_service_module
+from shared.melhor_envio import MelhorEnvioAPIError
+from src.payment import handler as handler_module
+from src.payment.exceptions import MercadoPagoAPIError, PaymentDeclinedError
 from src.payment.handler import lambda_handler
+from src.shared.fastjson import dumps, loads
+
+# Um único mock com spec de PaymentService para o arquivo inteiro: cada teste só o reseta
+# (copy.copy de MagicMock compartilharia os mocks filhos entre testes).
+_SERVICE_MOCK = MagicMock(spec=payment_service_module.PaymentService)
+
+
+@pytest.fixture(scope="module")
+def _patched_payment_service():
+    """Patch de service.PaymentService aplicado uma vez por módulo."""
+    with patch.object(payment_service_module, "PaymentService", return_value=_SERVICE_MOCK):
+        yield _SERVICE_MOCK
 
 
 @pytest.fixture
-def mock_payment_service():
+def mock_payment_service(_patched_payment_service: MagicMock) -> MagicMock:
     """Mock da classe PaymentService para evitar lógica real (import tardio em handler)."""
-    with patch("service.PaymentService") as mock_service_class:
-        mock_instance = MagicMock()
-        mock_service_class.return_value = mock_instance
-        yield mock_instance
+    _patched_payment_service.reset_mock(return_value=True, side_effect=True)
+    return _patched_payment_service
 
 
 @pytest.fixture
 def mock_logger():
     """Mock do Logger para não poluir o terminal."""
-    with patch("src.payment.handler.logger") as mock_log:
+    with patch.object(handler_module, "logger") as mock_log:
         yield mock_log
 
 
-def _create_event(body: dict = None, http_method: str = "POST") -> dict:
-    """Helper para criar eventos simulados do API Gateway."""
+BASE_PAYLOAD = {
+    "transaction_amount": 125.90,  # 100 + frete
+    "payment_method_id": "pix",
+    "installments": 1,
+    "payer": {
+        "email": "test@example.com",
+        "first_name": "Test",
+        "last_name": "User",
+        "identification": {"type": "CPF", "number": "12345678900"}
+    },
+    "user_id": "user-123",
+    "items": [{"id": 1, "name": "Produto Teste", "price": 100.00, "quantity": 1}],
+    "frete": 25.90,
+    "frete_service": "jadlog_package",
+    "cep": "01310100",
+}
+
+
+# Body padrão serializado uma vez; testes que não alteram o payload reaproveitam a string
+_BASE_BODY_JSON = dumps(BASE_PAYLOAD)
+
+
+def _create_event(body: dict = None, http_method: str = "POST", body_json: str = None) -> dict:
+    """Helper para criar eventos simulados do API Gateway (``body_json``: body já serializado)."""
+    if body_json is None and body:
+        body_json = dumps(body)
     return {
-        "body": json.dumps(body) if body else None,
+        "body": body_json,
         "requestContext": {
             "http": {
                 "method": http_method
@@ -36,157 +73,171 @@ def _create_event(body: dict = None, http_method: str = "POST") -> dict:
     }
 
 
+# Evento estático do preflight: o handler não muta o evento, então é compartilhado sem cópia
+_OPTIONS_EVENT = _create_event(http_method="OPTIONS")
+
+
 class TestPaymentLambdaHandler:
     """Testes unitários para a função lambda_handler."""
 
-    def test_handler_success_201_creates_payment(
-        self, mock_payment_service: MagicMock, mock_logger: MagicMock
+    @pytest.mark.parametrize(
+        "mp_return, extra_payload",
+        [
+            (
+                {
+                    "order_id": "order-123",
+                    "mp_payment_id": "mp-456",
+                    "status": "approved",
+                    "qr_code": "00020101021243650016COM.MERCADOLIBRE...",
+                },
+                {},
+            ),
+            (
+                {
+                    "order_id": "order-pix-123",
+                    "mp_payment_id": "mp-pix-456",
+                    "status": "pending",
+                    "qr_code": "00020101021243650016COM.MERCADOLIBRE02013063204C3F1",
+                    "qr_code_base64": "iVBORw0KGgoAAAANSUhEUgAA...",
+                },
+                {
+                    "transaction_amount": 75.90,  # 50 + frete
+                    "items": [{"id": 2, "name": "Produto PIX", "price": 50.00, "quantity": 1}],
+                },
+            ),
+            (
+                {
+                    "order_id": "order-card-789",
+                    "mp_payment_id": "mp-card-012",
+                    "status": "approved",
+                    "status_detail": "accredited",
+                    "installments": 3,
+                },
+                {
+                    "transaction_amount": 325.90,  # 300 + frete
+                    "payment_method_id": "credit_card",
+                    "token": "card-token-abc123",
+                    "installments": 3,
+                    "items": [{"id": 3, "name": "Produto Caro", "price": 300.00, "quantity": 1}],
+                },
+            ),
+            ({"order_id": "order-123", "status": "approved"}, {}),
+        ],
+        ids=["success", "pix", "card", "cors"],
+    )
+    def test_handler_success_201(
+        self,
+        mock_payment_service: MagicMock,
+        mock_logger: MagicMock,
+        mp_return: dict,
+        extra_payload: dict,
     ) -> None:
         """
-        Cenário: Payload válido enviado para processar pagamento.
-        Esperado: Retorna statusCode 201 com dados do pagamento.
+        Cenário: Payload válido (PIX ou cartão) e service processa o pagamento.
+        Esperado: 201 com o retorno do service no body e headers CORS.
         """
-        # Arrange: Mock do retorno do service
-        mock_payment_service.process_payment.return_value = {
-            "order_id": "order-123",
-            "mp_payment_id": "mp-456",
-            "status": "approved",
-            "qr_code": "00020101021243650016COM.MERCADOLIBRE..."
-        }
-        
-        # Payload válido simulado
-        event = _create_event({
-            "transaction_amount": 125.90,  # 100 + frete
-            "payment_method_id": "pix",
-            "installments": 1,
-            "payer": {
-                "email": "test@example.com",
-                "first_name": "Test",
-                "last_name": "User",
-                "identification": {"type": "CPF", "number": "12345678900"}
-            },
-            "user_id": "user-123",
-            "items": [{"id": 1, "name": "Produto Teste", "price": 100.00, "quantity": 1}],
-            "frete": 25.90,
-            "frete_service": "jadlog_package",
-            "cep": "01310100",
-        })
-        
-        # Act
+        mock_payment_service.process_payment.return_value = mp_return
+        if extra_payload:
+            event = _create_event({**BASE_PAYLOAD, **extra_payload})
+        else:
+            event = _create_event(body_json=_BASE_BODY_JSON)
+
         response = lambda_handler(event, None)
-        
-        # Assert
+
         assert response["statusCode"] == 201
-        
-        body = json.loads(response["body"])
-        assert body["order_id"] == "order-123"
-        assert body["mp_payment_id"] == "mp-456"
-        assert body["status"] == "approved"
-        assert "qr_code" in body
-        
-        # Verifica que o service foi chamado
+        assert loads(response["body"]) == mp_return
+        assert response["headers"]["Access-Control-Allow-Origin"] == "*"
+        assert "Access-Control-Allow-Methods" in response["headers"]
         mock_payment_service.process_payment.assert_called_once()
 
     def test_handler_validation_error_400_missing_required_fields(
-        self, mock_payment_service: MagicMock, mock_logger: MagicMock
+        self, mock_payment_service: MagicMock, mock_logger: MagicMock, monkeypatch: pytest.MonkeyPatch
     ) -> None:
         """
         Cenário: Payload com campos obrigatórios faltando (ValidationError do Pydantic).
         Esperado: Retorna statusCode 400 com mensagem de erro.
         """
-        # Arrange: Mock do parse para lançar ValidationError
-        with patch("src.payment.handler.parse") as mock_parse:
-            from pydantic import ValidationError
-            
-            # Simula erro de validação do Pydantic
-            mock_parse.side_effect = ValueError(
-                "1 validation error for PaymentInput\npayer\n  Field required [type=missing, input_value={...}]"
-            )
-            
-            event = _create_event({
-                "transaction_amount": 100.00,
-                "payment_method_id": "pix"
-                # Falta: payer, user_id, items
-            })
-            
-            # Act
-            response = lambda_handler(event, None)
-            
-            # Assert
-            assert response["statusCode"] == 400
-            
-            body = json.loads(response["body"])
-            assert "error" in body
-            assert body["error"] == "Dados inválidos"
-            assert "details" in body
-            
-            # Service NÃO deve ter sido chamado (erro na validação antes)
-            mock_payment_service.process_payment.assert_not_called()
+        # Arrange: parse simula o ValueError da validação do Pydantic
+        monkeypatch.setattr(handler_module, "parse", MagicMock(side_effect=ValueError(
+            "1 validation error for PaymentInput\npayer\n  Field required [type=missing, input_value={...}]"
+        )))
+        
+        event = _create_event({
+            "transaction_amount": 100.00,
+            "payment_method_id": "pix"
+            # Falta: payer, user_id, items
+        })
+        
+        # Act
+        response = lambda_handler(event, None)
+        
+        # Assert
+        assert response["statusCode"] == 400
+        
+        body = loads(response["body"])
+        assert "error" in body
+        assert body["error"] == "Dados inválidos"
+        assert "details" in body
+        
+        # Service NÃO deve ter sido chamado (erro na validação antes)
+        mock_payment_service.process_payment.assert_not_called()
 
     def test_handler_validation_error_400_invalid_json(
-        self, mock_payment_service: MagicMock, mock_logger: MagicMock
+        self, mock_payment_service: MagicMock, mock_logger: MagicMock, monkeypatch: pytest.MonkeyPatch
     ) -> None:
         """
         Cenário: Body com JSON malformado.
         Esperado: Retorna statusCode 400.
         """
-        # Arrange: Mock do parse para simular JSON inválido
-        with patch("src.payment.handler.parse") as mock_parse:
-            mock_parse.side_effect = ValueError("Invalid JSON format")
-            
-            event = {
-                "body": "{invalid json syntax}",
-                "requestContext": {"http": {"method": "POST"}},
-                "headers": {"Content-Type": "application/json"}
-            }
-            
-            # Act
-            response = lambda_handler(event, None)
-            
-            # Assert
-            assert response["statusCode"] == 400
-            body = json.loads(response["body"])
-            assert "error" in body
-            assert body["error"] == "Dados inválidos"
-
-    def test_handler_internal_error_500_service_exception(
-        self, mock_payment_service: MagicMock, mock_logger: MagicMock
-    ) -> None:
-        """
-        Cenário: PaymentService lança exceção genérica (ex: erro do Mercado Pago).
-        Esperado: Retorna statusCode 500 com mensagem de erro.
-        """
-        # Arrange: Mock lançando exceção
-        mock_payment_service.process_payment.side_effect = Exception(
-            "Erro Mercado Pago: Timeout na comunicação"
-        )
-        event = _create_event({
-            "transaction_amount": 125.90,
-            "payment_method_id": "pix",
-            "installments": 1,
-            "payer": {"email": "test@example.com", "identification": {"number": "12345678900"}},
-            "user_id": "user-123",
-            "items": [{"id": 1, "name": "Produto", "price": 100.00, "quantity": 1}],
-            "frete": 25.90,
-            "frete_service": "jadlog_package",
-            "cep": "01310100",
-            })
+        # Arrange: parse simula JSON inválido
+        monkeypatch.setattr(handler_module, "parse", MagicMock(side_effect=ValueError("Invalid JSON format")))
+        
+        event = {
+            "body": "{invalid json syntax}",
+            "requestContext": {"http": {"method": "POST"}},
+            "headers": {"Content-Type": "application/json"}
+        }
         
         # Act
         response = lambda_handler(event, None)
         
         # Assert
-        assert response["statusCode"] == 500
-        
-        body = json.loads(response["body"])
+        assert response["statusCode"] == 400
+        body = loads(response["body"])
         assert "error" in body
-        assert "Erro Mercado Pago" in str(body["error"])
+        assert body["error"] == "Dados inválidos"
+
+    @pytest.mark.parametrize(
+        "exc, expected_status, body_contains",
+        [
+            (Exception("Erro Mercado Pago: Timeout na comunicação"), 500, "Erro Mercado Pago"),
+            (MercadoPagoAPIError("invalid_token", {"message": "invalid_token"}), 502, "invalid_token"),
+            (MelhorEnvioAPIError("Timeout ao conectar na API de frete"), 502, "Timeout"),
+        ],
+        ids=["generic_500", "mercadopago_502", "melhor_envio_502"],
+    )
+    def test_handler_service_error_maps_status(
+        self,
+        mock_payment_service: MagicMock,
+        mock_logger: MagicMock,
+        exc: Exception,
+        expected_status: int,
+        body_contains: str,
+    ) -> None:
+        """
+        Cenário: PaymentService lança exceção genérica, do Mercado Pago ou da API de frete.
+        Esperado: 500 (genérica) ou 502 (APIs externas) com a mensagem em "error".
+        """
+        mock_payment_service.process_payment.side_effect = exc
+
+        response = lambda_handler(_create_event(body_json=_BASE_BODY_JSON), None)
+
+        assert response["statusCode"] == expected_status
+        assert body_contains in loads(response["body"])["error"]
 
     def test_handler_payment_declined_422(
         self, mock_payment_service: MagicMock, mock_logger: MagicMock
     ) -> None:
-        from src.payment.exceptions import PaymentDeclinedError
-
         mock_payment_service.process_payment.side_effect = PaymentDeclinedError(
             {"id": 1, "status": "rejected", "status_detail": "cc_rejected_high_risk", "message": "Pagamento recusado."}
         )
@@ -205,34 +256,10 @@ class TestPaymentLambdaHandler:
         })
         response = lambda_handler(event, None)
         assert response["statusCode"] == 422
-        body = json.loads(response["body"])
+        body = loads(response["body"])
         assert body.get("status_detail") == "cc_rejected_high_risk"
         assert "error" in body
 
-    def test_handler_mercadopago_api_error_502(
-        self, mock_payment_service: MagicMock, mock_logger: MagicMock
-    ) -> None:
-        from src.payment.exceptions import MercadoPagoAPIError
-
-        mock_payment_service.process_payment.side_effect = MercadoPagoAPIError(
-            "invalid_token", {"message": "invalid_token"}
-        )
-        event = _create_event({
-            "transaction_amount": 125.90,
-            "payment_method_id": "pix",
-            "installments": 1,
-            "payer": {"email": "a@b.com", "identification": {"number": "12345678900"}},
-            "user_id": "user-1",
-            "items": [{"id": 1, "name": "P", "price": 100.00, "quantity": 1}],
-            "frete": 25.90,
-            "frete_service": "jadlog_package",
-            "cep": "01310100",
-        })
-        response = lambda_handler(event, None)
-        assert response["statusCode"] == 502
-        body = json.loads(response["body"])
-        assert "invalid_token" in body.get("error", "")
-
     def test_handler_cors_options_returns_200_empty(
         self, mock_payment_service: MagicMock, mock_logger: MagicMock
     ) -> None:
@@ -241,7 +268,7 @@ class TestPaymentLambdaHandler:
         Esperado: Retorna statusCode 200 com body vazio.
         """
         # Arrange
-        event = _create_event(http_method="OPTIONS")
+        event = _OPTIONS_EVENT
         
         # Act
         response = lambda_handler(event, None)
@@ -249,154 +276,8 @@ class TestPaymentLambdaHandler:
         # Assert
         assert response["statusCode"] == 200
         
-        body = json.loads(response["body"])
+        body = loads(response["body"])
         assert body == {}
         
         # Service NÃO deve ser chamado em OPTIONS
         mock_payment_service.process_payment.assert_not_called()
-
-    def test_handler_includes_cors_headers(
-        self, mock_payment_service: MagicMock, mock_logger: MagicMock
-    ) -> None:
-        """
-        Cenário: Qualquer resposta do handler.
-        Esperado: Deve incluir headers CORS.
-        """
-        # Arrange
-        mock_payment_service.process_payment.return_value = {
-            "order_id": "order-123",
-            "status": "approved"
-        }
-        
-        event = _create_event({
-            "transaction_amount": 125.90,
-            "payment_method_id": "pix",
-            "installments": 1,
-            "payer": {"email": "test@example.com", "identification": {"number": "12345678900"}},
-            "user_id": "user-123",
-            "items": [{"id": 1, "name": "Produto", "price": 100.00, "quantity": 1}],
-            "frete": 25.90,
-            "frete_service": "jadlog_package",
-            "cep": "01310100",
-        })
-        
-        # Act
-        response = lambda_handler(event, None)
-        
-        # Assert
-        assert "headers" in response
-        assert "Access-Control-Allow-Origin" in response["headers"]
-        assert response["headers"]["Access-Control-Allow-Origin"] == "*"
-        assert "Access-Control-Allow-Methods" in response["headers"]
-
-    def test_handler_pix_payment_returns_qr_code(
-        self, mock_payment_service: MagicMock, mock_logger: MagicMock
-    ) -> None:
-        """
-        Cenário: Pagamento PIX bem-sucedido.
-        Esperado: Resposta contém campo 'qr_code' e 'qr_code_base64'.
-        """
-        # Arrange
-        mock_payment_service.process_payment.return_value = {
-            "order_id": "order-pix-123",
-            "mp_payment_id": "mp-pix-456",
-            "status": "pending",
-            "qr_code": "00020101021243650016COM.MERCADOLIBRE02013063204C3F1",
-            "qr_code_base64": "iVBORw0KGgoAAAANSUhEUgAA..."
-        }
-        
-        event = _create_event({
-            "transaction_amount": 75.90,  # 50 + frete
-            "payment_method_id": "pix",
-            "installments": 1,
-            "payer": {"email": "pix@example.com", "identification": {"number": "98765432100"}},
-            "user_id": "user-pix",
-            "items": [{"id": 2, "name": "Produto PIX", "price": 50.00, "quantity": 1}],
-            "frete": 25.90,
-            "frete_service": "jadlog_package",
-            "cep": "01310100",
-        })
-        
-        # Act
-        response = lambda_handler(event, None)
-        
-        # Assert
-        assert response["statusCode"] == 201
-        
-        body = json.loads(response["body"])
-        assert body["status"] == "pending"
-        assert "qr_code" in body
-        assert "qr_code_base64" in body
-        assert body["qr_code"].startswith("00020101")
-
-    def test_handler_card_payment_success(
-        self, mock_payment_service: MagicMock, mock_logger: MagicMock
-    ) -> None:
-        """
-        Cenário: Pagamento com Cartão de Crédito bem-sucedido.
-        Esperado: Retorna status 'approved' e detalhes do pagamento.
-        """
-        # Arrange
-        mock_payment_service.process_payment.return_value = {
-            "order_id": "order-card-789",
-            "mp_payment_id": "mp-card-012",
-            "status": "approved",
-            "status_detail": "accredited",
-            "installments": 3
-        }
-        
-        event = _create_event({
-            "transaction_amount": 325.90,  # 300 + frete
-            "payment_method_id": "credit_card",
-            "token": "card-token-abc123",
-            "installments": 3,
-            "payer": {
-                "email": "card@example.com",
-                "first_name": "Card",
-                "last_name": "User",
-                "identification": {"number": "11122233344"}
-            },
-            "user_id": "user-card",
-            "items": [{"id": 3, "name": "Produto Caro", "price": 300.00, "quantity": 1}],
-            "frete": 25.90,
-            "frete_service": "jadlog_package",
-            "cep": "01310100",
-        })
-        
-        # Act
-        response = lambda_handler(event, None)
-        
-        # Assert
-        assert response["statusCode"] == 201
-        
-        body = json.loads(response["body"])
-        assert body["status"] == "approved"
-        assert body["installments"] == 3
-
-    def test_handler_melhor_envio_error_502(
-        self, mock_payment_service: MagicMock, mock_logger: MagicMock
-    ) -> None:
-        """
-        Cenário: PaymentService lança MelhorEnvioAPIError (falha na API de frete).
-        Esperado: Retorna statusCode 502.
-        """
-        from shared.melhor_envio import MelhorEnvioAPIError
-        mock_payment_service.process_payment.side_effect = MelhorEnvioAPIError(
-            "Timeout ao conectar na API de frete"
-        )
-        event = _create_event({
-            "transaction_amount": 125.90,
-            "payment_method_id": "pix",
-            "installments": 1,
-            "payer": {"email": "a@b.com", "identification": {"number": "12345678900"}},
-            "user_id": "user-1",
-            "items": [{"id": 1, "name": "P", "price": 100.00, "quantity": 1}],
-            "frete": 25.90,
-            "frete_service": "jadlog_package",
-            "cep": "01310100",
-        })
-        response = lambda_handler(event, None)
-        assert response["statusCode"] == 502
-        body = json.loads(response["body"])
-        assert "error" in body
-        assert "Frete" in body["error"] or "frete" in body["error"] or "Timeout" in body["error"]
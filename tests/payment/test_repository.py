@@ -1,19 +1,52 @@
 import pytest
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock, call
 
+from src.payment import repository as repository_module
 from src.payment.repository import PaymentRepository
-from src.payment.schemas import Item
+from src.payment.schemas import Identification, Item, Payer, PaymentInput
 
 
-@pytest.fixture
-def mock_supabase_client():
-    """Mock do cliente Supabase com estrutura encadeada de métodos."""
-    with patch("src.payment.repository.get_supabase_client") as mock_get_client:
-        mock_client = MagicMock()
+@pytest.fixture(scope="module")
+def _module_supabase_client():
+    """Patch de get_supabase_client aplicado uma vez por módulo."""
+    with patch.object(repository_module, "get_supabase_client") as mock_get_client:
+        # spec estreito: só o que o repository usa (sem montar dunders/atributos à toa)
+        mock_client = MagicMock(spec=["table"])
         mock_get_client.return_value = mock_client
         yield mock_client
 
 
+@pytest.fixture
+def mock_supabase_client(_module_supabase_client: MagicMock) -> MagicMock:
+    """Mock do cliente Supabase com estrutura encadeada de métodos (zerado a cada teste)."""
+    _module_supabase_client.reset_mock(return_value=True, side_effect=True)
+    return _module_supabase_client
+
+
+# Métodos de tabela que o PaymentRepository encadeia
+_TABLE_SPEC = ["select", "update", "insert"]
+
+
+def _wire_supabase(client: MagicMock, select_data=None, variant_data=None) -> MagicMock:
+    """
+    Liga ``client.table(...)`` a um único mock de tabela com as cadeias usadas pelo repository.
+
+    - select().eq().execute().data -> ``select_data`` (busca por id)
+    - select().eq().eq().eq().execute().data -> ``variant_data`` (variante product_id+color+size;
+      vazio = sem variante, update_stock cai no products.stock legado)
+    - insert().execute().data -> [{"id": "order-x"}]
+    """
+    table = MagicMock(spec=_TABLE_SPEC)
+    client.table.return_value = table
+    select_eq = table.select.return_value.eq.return_value
+    # Resultados de execute() só têm .data lido: SimpleNamespace basta (bem mais leve que MagicMock)
+    select_eq.execute.return_value = SimpleNamespace(data=select_data)
+    select_eq.eq.return_value.eq.return_value.execute.return_value = SimpleNamespace(data=variant_data or [])
+    table.insert.return_value.execute.return_value = SimpleNamespace(data=[{"id": "order-x"}])
+    return table
+
+
 @pytest.fixture
 def sample_order_items():
     """Lista de itens para testes de pedidos."""
@@ -23,6 +56,47 @@ def sample_order_items():
     ]
 
 
+# Respostas do MP usadas só para leitura em create_order (compartilhadas entre testes)
+_MP_RESPONSE = {"id": "mp-123", "status": "approved"}
+_EMPTY_MP_RESPONSE = {"id": "mp-empty"}
+
+
+# PaymentInput válido, validado uma única vez no import (só leitura em create_order)
+_GOLDEN_PAYMENT_INPUT = PaymentInput(
+    transaction_amount=175.90,  # subtotal 150 + frete 25.90
+    payment_method_id="pix",
+    installments=1,
+    payer=Payer(
+        email="test@example.com",
+        first_name="Test",
+        last_name="User",
+        identification=Identification(type="CPF", number="12345678900")
+    ),
+    user_id="user-123",
+    items=[
+        Item(id=1, name="Produto A", price=50.00, quantity=2, image="img.png"),
+        Item(id=2, name="Produto B", price=50.00, quantity=1)
+    ],
+    frete=25.90,
+    frete_service="jadlog_package",
+    cep="01310100",
+)
+
+
+@pytest.fixture
+def make_payment_input():
+    """
+    Factory de PaymentInput a partir do golden.
+
+    Variantes usam model_copy(update=...): não reexecuta a validação (nem dos campos alterados),
+    aceitável aqui porque o schema não é o alvo destes testes.
+    """
+    def _make(**overrides) -> PaymentInput:
+        return _GOLDEN_PAYMENT_INPUT.model_copy(update=overrides) if overrides else _GOLDEN_PAYMENT_INPUT
+
+    return _make
+
+
 class TestPaymentRepositoryGetProductPrice:
     """Testes para o método get_product_price."""
 
@@ -31,17 +105,8 @@ class TestPaymentRepositoryGetProductPrice:
         Cenário: Produto existe no banco.
         Esperado: Retorna dict com id e price.
         """
-        # Arrange: Mock da cadeia de métodos do Supabase
-        mock_table = MagicMock()
-        mock_select = MagicMock()
-        mock_eq = MagicMock()
-        mock_execute = MagicMock()
-        
-        mock_supabase_client.table.return_value = mock_table
-        mock_table.select.return_value = mock_select
-        mock_select.eq.return_value = mock_eq
-        mock_eq.execute.return_value = mock_execute
-        mock_execute.data = [{"id": 1, "price": 50.00}]
+        # Arrange
+        table = _wire_supabase(mock_supabase_client, select_data=[{"id": 1, "price": 50.00}])
         
         # Act
         repo = PaymentRepository()
@@ -50,8 +115,8 @@ class TestPaymentRepositoryGetProductPrice:
         # Assert
         assert result == {"id": 1, "price": 50.00}
         mock_supabase_client.table.assert_called_once_with("products")
-        mock_table.select.assert_called_once_with("id, price")
-        mock_select.eq.assert_called_once_with("id", 1)
+        table.select.assert_called_once_with("id, price")
+        table.select.return_value.eq.assert_called_once_with("id", 1)
 
     def test_get_product_price_not_found(self, mock_supabase_client: MagicMock) -> None:
         """
@@ -59,16 +124,7 @@ class TestPaymentRepositoryGetProductPrice:
         Esperado: Retorna None.
         """
         # Arrange
-        mock_table = MagicMock()
-        mock_select = MagicMock()
-        mock_eq = MagicMock()
-        mock_execute = MagicMock()
-        
-        mock_supabase_client.table.return_value = mock_table
-        mock_table.select.return_value = mock_select
-        mock_select.eq.return_value = mock_eq
-        mock_eq.execute.return_value = mock_execute
-        mock_execute.data = []  # Produto não encontrado
+        _wire_supabase(mock_supabase_client, select_data=[])  # Produto não encontrado
         
         # Act
         repo = PaymentRepository()
@@ -82,32 +138,19 @@ class TestPaymentRepositoryGetProductPriceAndStock:
     """Testes para get_product_price_and_stock (preço + estoque para pagamento)."""
 
     def test_get_product_price_and_stock_found(self, mock_supabase_client: MagicMock) -> None:
-        mock_table = MagicMock()
-        mock_select = MagicMock()
-        mock_eq = MagicMock()
-        mock_execute = MagicMock()
-        mock_supabase_client.table.return_value = mock_table
-        mock_table.select.return_value = mock_select
-        mock_select.eq.return_value = mock_eq
-        mock_eq.execute.return_value = mock_execute
-        mock_execute.data = [{"id": 1, "price": 50.00, "stock": {"Único": 10}, "quantity": 10}]
+        table = _wire_supabase(
+            mock_supabase_client,
+            select_data=[{"id": 1, "price": 50.00, "stock": {"Único": 10}, "quantity": 10}],
+        )
 
         repo = PaymentRepository()
         result = repo.get_product_price_and_stock(1)
 
         assert result == {"id": 1, "price": 50.00, "stock": {"Único": 10}, "quantity": 10}
-        mock_table.select.assert_called_once_with("id, price, stock, quantity")
+        table.select.assert_called_once_with("id, price, stock, quantity")
 
     def test_get_product_price_and_stock_not_found(self, mock_supabase_client: MagicMock) -> None:
-        mock_table = MagicMock()
-        mock_select = MagicMock()
-        mock_eq = MagicMock()
-        mock_execute = MagicMock()
-        mock_supabase_client.table.return_value = mock_table
-        mock_table.select.return_value = mock_select
-        mock_select.eq.return_value = mock_eq
-        mock_eq.execute.return_value = mock_execute
-        mock_execute.data = []
+        _wire_supabase(mock_supabase_client, select_data=[])
 
         repo = PaymentRepository()
         result = repo.get_product_price_and_stock(999)
@@ -118,254 +161,110 @@ class TestPaymentRepositoryGetProductPriceAndStock:
 class TestPaymentRepositoryUpdateStock:
     """Testes para o método update_stock (lógica complexa de JSON stock)."""
 
-    def test_update_stock_exact_size_match_reduces_correctly(
-        self, mock_supabase_client: MagicMock
+    @pytest.mark.parametrize(
+        "select_data, item, expected_update",
+        [
+            # {"M": 10}, venda de 2 "M" -> {"M": 8}, quantity=8
+            (
+                [{"stock": {"M": 10}, "quantity": 10}],
+                Item(id=1, name="Camiseta", price=50.00, quantity=2, size="M"),
+                {"stock": {"M": 8}, "quantity": 8},
+            ),
+            # {"P": 5, "M": 10, "G": 3}, venda de 2 "M" -> quantity=16 (5+8+3)
+            (
+                [{"stock": {"P": 5, "M": 10, "G": 3}, "quantity": 18}],
+                Item(id=1, name="Camiseta", price=50.00, quantity=2, size="M"),
+                {"stock": {"P": 5, "M": 8, "G": 3}, "quantity": 16},
+            ),
+            # Item sem tamanho: desconta de "Único"
+            (
+                [{"stock": {"Único": 5}, "quantity": 5}],
+                Item(id=1, name="Produto Único", price=30.00, quantity=1),
+                {"stock": {"Único": 4}, "quantity": 4},
+            ),
+            # Overselling: max(0, ...) impede estoque negativo
+            (
+                [{"stock": {"M": 2}, "quantity": 2}],
+                Item(id=1, name="Camiseta", price=50.00, quantity=5, size="M"),
+                {"stock": {"M": 0}, "quantity": 0},
+            ),
+            # Produto não encontrado: segue sem quebrar e sem update
+            (
+                [],
+                Item(id=999, name="Inexistente", price=10.00, quantity=1),
+                None,
+            ),
+        ],
+        ids=["exact_size", "multiple_sizes", "fallback_unico", "no_negative", "not_found"],
+    )
+    def test_update_stock_legacy_products_stock(
+        self, mock_supabase_client: MagicMock, select_data, item, expected_update
     ) -> None:
         """
-        Cenário: Produto tem {"M": 10}, venda de 2 unidades tamanho "M".
-        Esperado: stock atualizado para {"M": 8}, quantity=8.
+        Cenário: sem variante em product_variants -> baixa em products.stock (legado).
+        Esperado: um update com stock/quantity recalculados, ou nenhum se o produto não existe.
         """
-        # Arrange: Mock select (busca produto)
-        mock_table_select = MagicMock()
-        mock_select = MagicMock()
-        mock_eq_select = MagicMock()
-        mock_execute_select = MagicMock()
-        
-        mock_supabase_client.table.return_value = mock_table_select
-        mock_table_select.select.return_value = mock_select
-        mock_select.eq.return_value = mock_eq_select
-        mock_eq_select.execute.return_value = mock_execute_select
-        mock_execute_select.data = [
-            {"stock": {"M": 10}, "quantity": 10}
-        ]
-        
-        # Mock update (atualiza produto)
-        mock_table_update = MagicMock()
-        mock_update = MagicMock()
-        mock_eq_update = MagicMock()
-        mock_execute_update = MagicMock()
-        
-        # Configura para retornar o mock_table_update quando update for chamado
-        # mas preserva o select anterior
-        def table_side_effect(table_name):
-            if mock_supabase_client.table.call_count <= 1:
-                return mock_table_select
-            else:
-                return mock_table_update
-        
-        mock_supabase_client.table.side_effect = table_side_effect
-        mock_table_update.update.return_value = mock_update
-        mock_update.eq.return_value = mock_eq_update
-        mock_eq_update.execute.return_value = mock_execute_update
-        
-        # Act
-        repo = PaymentRepository()
-        items = [Item(id=1, name="Camiseta", price=50.00, quantity=2, size="M")]
-        repo.update_stock(items)
-        
-        # Assert: Verifica que update foi chamado com valores corretos
-        mock_table_update.update.assert_called_once()
-        update_data = mock_table_update.update.call_args[0][0]
-        
-        assert update_data["stock"] == {"M": 8}
-        assert update_data["quantity"] == 8
-        mock_update.eq.assert_called_once_with("id", 1)
+        table = _wire_supabase(mock_supabase_client, select_data=select_data)
 
-    def test_update_stock_multiple_sizes_calculates_total_correctly(
-        self, mock_supabase_client: MagicMock
-    ) -> None:
-        """
-        Cenário: Produto tem {"P": 5, "M": 10, "G": 3}, venda de 2 "M".
-        Esperado: stock={"P": 5, "M": 8, "G": 3}, quantity=16 (5+8+3).
-        """
-        # Arrange
-        mock_table = MagicMock()
-        mock_supabase_client.table.return_value = mock_table
-        
-        # Select (primeira chamada)
-        mock_select = MagicMock()
-        mock_eq_select = MagicMock()
-        mock_execute_select = MagicMock()
-        mock_table.select.return_value = mock_select
-        mock_select.eq.return_value = mock_eq_select
-        mock_eq_select.execute.return_value = mock_execute_select
-        mock_execute_select.data = [
-            {"stock": {"P": 5, "M": 10, "G": 3}, "quantity": 18}
-        ]
-        
-        # Update (segunda chamada ao table)
-        mock_update = MagicMock()
-        mock_eq_update = MagicMock()
-        mock_execute_update = MagicMock()
-        mock_table.update.return_value = mock_update
-        mock_update.eq.return_value = mock_eq_update
-        mock_eq_update.execute.return_value = mock_execute_update
-        
-        # Act
-        repo = PaymentRepository()
-        items = [Item(id=1, name="Camiseta", price=50.00, quantity=2, size="M")]
-        repo.update_stock(items)
-        
-        # Assert
-        update_data = mock_table.update.call_args[0][0]
-        assert update_data["stock"] == {"P": 5, "M": 8, "G": 3}
-        assert update_data["quantity"] == 16
+        PaymentRepository().update_stock([item])
 
-    def test_update_stock_fallback_to_unico_when_size_not_found(
-        self, mock_supabase_client: MagicMock
-    ) -> None:
-        """
-        Cenário: Produto tem {"Único": 5}, item vendido sem tamanho ou tamanho inválido.
-        Esperado: Desconta de "Único", stock={"Único": 4}, quantity=4.
-        """
-        # Arrange
-        mock_table = MagicMock()
-        mock_supabase_client.table.return_value = mock_table
-        
-        mock_select = MagicMock()
-        mock_eq_select = MagicMock()
-        mock_execute_select = MagicMock()
-        mock_table.select.return_value = mock_select
-        mock_select.eq.return_value = mock_eq_select
-        mock_eq_select.execute.return_value = mock_execute_select
-        mock_execute_select.data = [
-            {"stock": {"Único": 5}, "quantity": 5}
-        ]
-        
-        mock_update = MagicMock()
-        mock_eq_update = MagicMock()
-        mock_execute_update = MagicMock()
-        mock_table.update.return_value = mock_update
-        mock_update.eq.return_value = mock_eq_update
-        mock_eq_update.execute.return_value = mock_execute_update
-        
-        # Act: Item sem tamanho (size=None ou não especificado, usa default "Único")
-        repo = PaymentRepository()
-        items = [Item(id=1, name="Produto Único", price=30.00, quantity=1)]
-        repo.update_stock(items)
-        
-        # Assert
-        update_data = mock_table.update.call_args[0][0]
-        assert update_data["stock"] == {"Único": 4}
-        assert update_data["quantity"] == 4
+        if expected_update is None:
+            table.update.assert_not_called()
+        else:
+            table.update.assert_called_once_with(expected_update)
+            table.update.return_value.eq.assert_called_once_with("id", item.id)
 
-    def test_update_stock_prevents_negative_stock(
+    def test_update_stock_uses_variant_when_present(
         self, mock_supabase_client: MagicMock
     ) -> None:
         """
-        Cenário: Produto tem {"M": 2}, venda de 5 unidades (overselling).
-        Esperado: stock não fica negativo, fica em {"M": 0}, quantity=0.
+        Cenário: Existe variante (product_id + color + size) com stock_quantity=10, venda de 3.
+        Esperado: product_variants atualizado para 7; products.stock legado não é tocado.
         """
         # Arrange
-        mock_table = MagicMock()
-        mock_supabase_client.table.return_value = mock_table
-        
-        mock_select = MagicMock()
-        mock_eq_select = MagicMock()
-        mock_execute_select = MagicMock()
-        mock_table.select.return_value = mock_select
-        mock_select.eq.return_value = mock_eq_select
-        mock_eq_select.execute.return_value = mock_execute_select
-        mock_execute_select.data = [
-            {"stock": {"M": 2}, "quantity": 2}
-        ]
-        
-        mock_update = MagicMock()
-        mock_eq_update = MagicMock()
-        mock_execute_update = MagicMock()
-        mock_table.update.return_value = mock_update
-        mock_update.eq.return_value = mock_eq_update
-        mock_eq_update.execute.return_value = mock_execute_update
-        
+        table = _wire_supabase(
+            mock_supabase_client,
+            select_data=[{"stock_quantity": 7}, {"stock_quantity": 4}],  # soma das variantes
+            variant_data=[{"id": "v-1", "stock_quantity": 10}],
+        )
+
         # Act
         repo = PaymentRepository()
-        items = [Item(id=1, name="Camiseta", price=50.00, quantity=5, size="M")]
-        repo.update_stock(items)
-        
-        # Assert: Usa max(0, ...) para prevenir negativo
-        update_data = mock_table.update.call_args[0][0]
-        assert update_data["stock"] == {"M": 0}
-        assert update_data["quantity"] == 0
+        repo.update_stock([Item(id=1, name="Camiseta", price=50.00, quantity=3, size="M")])
 
-    def test_update_stock_handles_product_not_found_gracefully(
-        self, mock_supabase_client: MagicMock, capfd
-    ) -> None:
-        """
-        Cenário: Produto não existe no banco.
-        Esperado: Continue sem quebrar (log de erro, mas não lança exceção).
-        """
-        # Arrange
-        mock_table = MagicMock()
-        mock_supabase_client.table.return_value = mock_table
-        
-        mock_select = MagicMock()
-        mock_eq_select = MagicMock()
-        mock_execute_select = MagicMock()
-        mock_table.select.return_value = mock_select
-        mock_select.eq.return_value = mock_eq_select
-        mock_eq_select.execute.return_value = mock_execute_select
-        mock_execute_select.data = []  # Produto não encontrado
-        
-        # Act: Não deve lançar exceção
-        repo = PaymentRepository()
-        items = [Item(id=999, name="Inexistente", price=10.00, quantity=1)]
-        repo.update_stock(items)
-        
-        # Assert: update NÃO deve ter sido chamado
-        mock_table.update.assert_not_called()
+        # Assert
+        updates = [c.args[0] for c in table.update.call_args_list]
+        assert updates == [{"stock_quantity": 7}, {"quantity": 11}]
 
 
 class TestPaymentRepositoryCreateOrder:
     """Testes para o método create_order."""
 
     def test_create_order_structure_includes_price_and_price_at_purchase(
-        self, mock_supabase_client: MagicMock
+        self, mock_supabase_client: MagicMock, make_payment_input
     ) -> None:
         """
         Cenário: Criar pedido com itens.
         Esperado: order_items tem TANTO 'price' QUANTO 'price_at_purchase' (compatibilidade).
         """
         # Arrange
-        mock_table = MagicMock()
+        mock_table = MagicMock(spec=_TABLE_SPEC)
         mock_supabase_client.table.return_value = mock_table
         
         # Mock insert de order
         mock_insert_order = MagicMock()
-        mock_execute_order = MagicMock()
         mock_table.insert.return_value = mock_insert_order
-        mock_insert_order.execute.return_value = mock_execute_order
-        mock_execute_order.data = [{"id": "order-123"}]
+        mock_insert_order.execute.return_value = SimpleNamespace(data=[{"id": "order-123"}])
         
         # Mock insert de order_items
         mock_insert_items = MagicMock()
-        mock_execute_items = MagicMock()
         # Segunda chamada ao insert (para itens)
         mock_table.insert.side_effect = [mock_insert_order, mock_insert_items]
-        mock_insert_items.execute.return_value = mock_execute_items
+        mock_insert_items.execute.return_value = SimpleNamespace(data=[])
         
-        # Payloads simulados
-        from src.payment.schemas import PaymentInput, Payer, Identification
-        payload = PaymentInput(
-            transaction_amount=175.90,  # subtotal 150 + frete 25.90
-            payment_method_id="pix",
-            installments=1,
-            payer=Payer(
-                email="test@example.com",
-                first_name="Test",
-                last_name="User",
-                identification=Identification(type="CPF", number="12345678900")
-            ),
-            user_id="user-123",
-            items=[
-                Item(id=1, name="Produto A", price=50.00, quantity=2, image="img.png"),
-                Item(id=2, name="Produto B", price=50.00, quantity=1)
-            ],
-            frete=25.90,
-            frete_service="jadlog_package",
-            cep="01310100",
-        )
+        payload = make_payment_input()
         
-        mp_response = {"id": "mp-123", "status": "approved"}
+        mp_response = _MP_RESPONSE
         
         # Act
         repo = PaymentRepository()
@@ -376,9 +275,11 @@ class TestPaymentRepositoryCreateOrder:
         
         order_insert_call = mock_table.insert.call_args_list[0]
         order_data = order_insert_call[0][0]
-        assert order_data["user_id"] == "user-123"
-        assert order_data["total_amount"] == 175.90
-        assert order_data["mp_payment_id"] == "mp-123"
+        assert {k: order_data[k] for k in ("user_id", "total_amount", "mp_payment_id")} == {
+            "user_id": "user-123",
+            "total_amount": 175.90,
+            "mp_payment_id": "mp-123",
+        }
         
         # Verifica que insert de items foi chamado com ambos os campos
         items_insert_call = mock_table.insert.call_args_list[1]
@@ -386,92 +287,53 @@ class TestPaymentRepositoryCreateOrder:
         
         assert len(items_data) == 2
         
-        # Item 1
-        assert items_data[0]["product_id"] == 1
-        assert items_data[0]["quantity"] == 2
-        assert items_data[0]["price"] == 50.00  # Campo legado
-        assert items_data[0]["price_at_purchase"] == 50.00  # Campo novo
-        assert items_data[0]["image_url"] == "img.png"
-        
-        # Item 2
-        assert items_data[1]["product_id"] == 2
-        assert items_data[1]["price"] == 50.00
-        assert items_data[1]["price_at_purchase"] == 50.00
+        # price: campo legado; price_at_purchase: campo novo
+        keys = ("product_id", "quantity", "price", "price_at_purchase", "image_url")
+        assert [{k: row[k] for k in keys} for row in items_data] == [
+            {"product_id": 1, "quantity": 2, "price": 50.00, "price_at_purchase": 50.00, "image_url": "img.png"},
+            {"product_id": 2, "quantity": 1, "price": 50.00, "price_at_purchase": 50.00, "image_url": None},
+        ]
 
     def test_create_order_raises_exception_if_order_insert_fails(
-        self, mock_supabase_client: MagicMock
+        self, mock_supabase_client: MagicMock, make_payment_input
     ) -> None:
         """
         Cenário: Insert do order retorna data vazio (falha).
         Esperado: Lança Exception.
         """
         # Arrange
-        mock_table = MagicMock()
+        mock_table = MagicMock(spec=_TABLE_SPEC)
         mock_supabase_client.table.return_value = mock_table
         
         mock_insert = MagicMock()
-        mock_execute = MagicMock()
         mock_table.insert.return_value = mock_insert
-        mock_insert.execute.return_value = mock_execute
-        mock_execute.data = []  # Falha ao salvar
-        
-        from src.payment.schemas import PaymentInput, Payer, Identification
-        payload = PaymentInput(
-            transaction_amount=125.90,
-            payment_method_id="pix",
-            payer=Payer(
-                email="test@example.com",
-                identification=Identification(number="12345678900")
-            ),
-            user_id="user-123",
-            items=[Item(id=1, name="Produto", price=100.00, quantity=1)],
-            frete=25.90,
-            frete_service="jadlog_package",
-            cep="01310100",
-        )
+        mock_insert.execute.return_value = SimpleNamespace(data=[])  # Falha ao salvar
         
         # Act & Assert
         repo = PaymentRepository()
-        with pytest.raises(Exception) as exc_info:
-            repo.create_order(payload, {"id": "mp-123"}, 125.90)
-        
-        assert "Falha ao salvar pedido" in str(exc_info.value)
+        with pytest.raises(Exception, match="Falha ao salvar pedido"):
+            repo.create_order(make_payment_input(), _MP_RESPONSE, 175.90)
 
     def test_create_order_handles_empty_items_gracefully(
-        self, mock_supabase_client: MagicMock
+        self, mock_supabase_client: MagicMock, make_payment_input
     ) -> None:
         """
         Cenário: Payload sem itens (items vazio).
         Esperado: Order criada, mas insert de items não é chamado.
         """
         # Arrange
-        mock_table = MagicMock()
+        mock_table = MagicMock(spec=_TABLE_SPEC)
         mock_supabase_client.table.return_value = mock_table
         
         mock_insert = MagicMock()
-        mock_execute = MagicMock()
         mock_table.insert.return_value = mock_insert
-        mock_insert.execute.return_value = mock_execute
-        mock_execute.data = [{"id": "order-empty-items"}]
+        mock_insert.execute.return_value = SimpleNamespace(data=[{"id": "order-empty-items"}])
         
-        from src.payment.schemas import PaymentInput, Payer, Identification
-        payload = PaymentInput(
-            transaction_amount=0.00,
-            payment_method_id="pix",
-            payer=Payer(
-                email="test@example.com",
-                identification=Identification(number="12345678900")
-            ),
-            user_id="user-123",
-            items=[],  # Lista vazia
-            frete=25.90,
-            frete_service="jadlog_package",
-            cep="01310100",
-        )
+        payload = make_payment_input(items=[], transaction_amount=0.00)  # Lista vazia
         
         # Act
         repo = PaymentRepository()
-        result = repo.create_order(payload, {"id": "mp-empty"}, 0.00)
+        result = repo.create_order(payload, _EMPTY_MP_RESPONSE, 0.00)
         
         # Assert: Order criada, mas items insert só foi chamado 1 vez (para order)
         assert result == {"id": "order-empty-items"}
@@ -1,170 +1,136 @@
 """Testes da validação de frete no PaymentService (Melhor Envio)."""
 
+import re
+
 import pytest
 from unittest.mock import patch, MagicMock
 
 from src.payment import service as payment_service
 from src.payment.service import PaymentService
-from src.payment.schemas import PaymentInput, Payer, Identification, Item
-from src.shared.melhor_envio import MelhorEnvioAPIError
-
-
-@pytest.fixture
-def mock_repository():
-    with patch("src.payment.service.PaymentRepository") as mock_repo_class:
-        mock_instance = MagicMock()
-        mock_instance.get_variant_stock.return_value = None
-        mock_repo_class.return_value = mock_instance
-        yield mock_instance
-
-
-@pytest.fixture
-def mock_mercadopago():
-    with patch("mercadopago.SDK") as mock_sdk:
-        with patch("mercadopago.config.RequestOptions", MagicMock):
-            yield mock_sdk
-
-
-def _payload(frete: float = 25.90, cep: str = "01310100", frete_service: str = "jadlog_package") -> PaymentInput:
-    return PaymentInput(
-        transaction_amount=100.00 + frete,  # subtotal 100 + frete
-        payment_method_id="pix",
-        installments=1,
-        payer=Payer(
-            email="test@example.com",
-            identification=Identification(number="12345678900"),
-        ),
-        user_id="user-123",
-        items=[Item(id=1, name="Produto", price=100.0, quantity=1)],
-        frete=frete,
-        frete_service=frete_service,
-        cep=cep,
+from src.payment.schemas import PaymentInput
+
+# Mesma classe que o service captura (import Lambda "shared.melhor_envio", não "src.shared.melhor_envio")
+MelhorEnvioAPIError = payment_service.MelhorEnvioAPIError
+
+
+# Validado uma vez por módulo; cada teste só troca frete/frete_service/total via model_copy
+_BASE_PAYLOAD = PaymentInput.model_validate(
+    {
+        "transaction_amount": 125.90,  # subtotal 100 + frete
+        "payment_method_id": "pix",
+        "installments": 1,
+        "payer": {"email": "test@example.com", "identification": {"number": "12345678900"}},
+        "user_id": "user-123",
+        "items": [{"id": 1, "name": "Produto", "price": 100.0, "quantity": 1}],
+        "frete": 25.90,
+        "frete_service": "jadlog_package",
+        "cep": "01310100",
+    }
+)
+
+
+def _payload(frete: float = 25.90, frete_service: str = "jadlog_package") -> PaymentInput:
+    return _BASE_PAYLOAD.model_copy(
+        update={"transaction_amount": 100.00 + frete, "frete": frete, "frete_service": frete_service}
     )
 
 
+# Frete enviado sem opção correspondente na cotação (nem por service, nem por preço)
+_FREIGHT_MISMATCH_RE = re.compile(r"não confere com nenhuma opção da cotação\. Recalcule o frete")
+
 OPTION_PAC = {"transportadora": "PAC", "preco": 25.90, "prazo_entrega_dias": 8, "service": "jadlog_package"}
 OPTION_JADLOG = {"transportadora": "Jadlog", "preco": 31.00, "prazo_entrega_dias": 5, "service": "jadlog_another"}
 
 
+@pytest.fixture(scope="module")
+def _patched_get_quote():
+    with patch.object(payment_service, "get_quote") as m:
+        yield m
+
+
+@pytest.fixture(autouse=True)
+def mock_get_quote(_patched_get_quote: MagicMock) -> MagicMock:
+    """Cotação padrão [OPTION_PAC]; testes sobrescrevem return_value/side_effect quando precisam."""
+    _patched_get_quote.reset_mock(return_value=True, side_effect=True)
+    _patched_get_quote.return_value = [OPTION_PAC]
+    return _patched_get_quote
+
+
+_DB_ROW = {"id": 1, "price": 100.00, "stock": {"Único": 100}, "quantity": 100}
+
+# (configuração de get_quote, kwargs de _payload)
+_FREIGHT_ACCEPT_CASES = [
+    pytest.param({}, {"frete": 25.90}, id="matches_quote"),
+    pytest.param({}, {"frete": 25.91}, id="within_tolerance"),
+    pytest.param(
+        {"return_value": [OPTION_PAC, OPTION_JADLOG]},
+        {"frete": 31.00, "frete_service": "jadlog_another"},
+        id="matches_chosen_service_option",
+    ),
+    # frete_service incorreto mas preço bate com alguma opção → aceita (fallback)
+    pytest.param(
+        {"return_value": [OPTION_PAC, OPTION_JADLOG]},
+        {"frete": 31.00, "frete_service": "wrong_service"},
+        id="fallback_by_price_when_service_wrong",
+    ),
+]
+
+# (configuração de get_quote, kwargs de _payload, exceção esperada, regex da mensagem)
+_FREIGHT_REJECT_CASES = [
+    pytest.param({}, {"frete": 15.00}, ValueError, _FREIGHT_MISMATCH_RE, id="divergence"),
+    pytest.param(
+        {"return_value": []}, {}, ValueError, r"Frete: nenhuma opção de frete disponível", id="no_options"
+    ),
+    pytest.param(
+        {"side_effect": MelhorEnvioAPIError("Timeout ao conectar")},
+        {},
+        MelhorEnvioAPIError,
+        r"^Frete: .*Timeout ao conectar",
+        id="api_error",
+    ),
+    # frete_service incorreto + preço sem correspondência na cotação → erro
+    pytest.param(
+        {},
+        {"frete": 99.99, "frete_service": "servico_inexistente"},
+        ValueError,
+        _FREIGHT_MISMATCH_RE,
+        id="service_wrong_and_price_invalid",
+    ),
+]
+
+
 class TestPaymentServiceFreightValidation:
     """Frete enviado deve coincidir com cotação Melhor Envio."""
 
-    def test_freight_valid_matches_quote(
-        self, mock_repository: MagicMock, mock_mercadopago: MagicMock
-    ) -> None:
-        with patch("src.payment.service.get_quote") as mock_get_quote:
-            mock_get_quote.return_value = [OPTION_PAC]
-            mock_repository.get_product_price_and_stock.return_value = {"id": 1, "price": 100.00, "stock": {"Único": 100}, "quantity": 100}
-            mock_mp = mock_mercadopago.return_value
-            mock_mp.payment.return_value.create.return_value = {
-                "status": 201,
-                "response": {"id": "mp-1", "status": "approved", "status_detail": "accredited"},
-            }
-            mock_repository.create_order.return_value = {"id": "order-1"}
-
-            service = PaymentService()
-            result = service.process_payment(_payload(frete=25.90))
-
-            assert result is not None
-            mock_get_quote.assert_called_once()
-            call_cep, call_products = mock_get_quote.call_args[0]
-            assert mock_get_quote.call_args.kwargs.get("timeout_sec") == payment_service._PAYMENT_QUOTE_TIMEOUT_SEC
-            assert call_cep == "01310100"
-            assert len(call_products) == 1
-            assert call_products[0]["quantity"] == 1
-
-    def test_freight_valid_within_tolerance(
-        self, mock_repository: MagicMock, mock_mercadopago: MagicMock
-    ) -> None:
-        with patch("src.payment.service.get_quote") as mock_get_quote:
-            mock_get_quote.return_value = [OPTION_PAC]
-            mock_repository.get_product_price_and_stock.return_value = {"id": 1, "price": 100.00, "stock": {"Único": 100}, "quantity": 100}
-            mock_mp = mock_mercadopago.return_value
-            mock_mp.payment.return_value.create.return_value = {
-                "status": 201,
-                "response": {"id": "mp-1", "status": "approved", "status_detail": "accredited"},
-            }
-            mock_repository.create_order.return_value = {"id": "order-1"}
-
-            service = PaymentService()
-            service.process_payment(_payload(frete=25.91))
-
-            mock_repository.create_order.assert_called_once()
-
-    def test_freight_invalid_divergence_raises_value_error(
-        self, mock_repository: MagicMock, mock_mercadopago: MagicMock
+    @pytest.mark.parametrize("quote, payload_kwargs", _FREIGHT_ACCEPT_CASES)
+    def test_freight_accepted(
+        self, mock_repository: MagicMock, mock_mercadopago: MagicMock, service: PaymentService,
+        mock_get_quote: MagicMock, quote: dict, payload_kwargs: dict,
     ) -> None:
-        with patch("src.payment.service.get_quote") as mock_get_quote:
-            mock_get_quote.return_value = [OPTION_PAC]
-            service = PaymentService()
-            with pytest.raises(ValueError) as exc_info:
-                service.process_payment(_payload(frete=15.00))
-            assert "não confere" in str(exc_info.value) or "Recalcule" in str(exc_info.value)
-            mock_repository.get_product_price_and_stock.assert_not_called()
-
-    def test_freight_no_options_raises_value_error(
-        self, mock_repository: MagicMock, mock_mercadopago: MagicMock
+        mock_get_quote.configure_mock(**quote)
+        mock_repository.get_product_price_and_stock.return_value = _DB_ROW
+
+        result = service.process_payment(_payload(**payload_kwargs))
+
+        assert result is not None
+        mock_get_quote.assert_called_once()
+        call_cep, call_products = mock_get_quote.call_args[0]
+        assert mock_get_quote.call_args.kwargs.get("timeout_sec") == payment_service._PAYMENT_QUOTE_TIMEOUT_SEC
+        assert call_cep == "01310100"
+        assert len(call_products) == 1
+        assert call_products[0]["quantity"] == 1
+        mock_repository.create_order.assert_called_once()
+
+    @pytest.mark.parametrize("quote, payload_kwargs, exc, match", _FREIGHT_REJECT_CASES)
+    def test_freight_rejected(
+        self, mock_repository: MagicMock, mock_mercadopago: MagicMock, service: PaymentService,
+        mock_get_quote: MagicMock, quote: dict, payload_kwargs: dict, exc: type, match,
     ) -> None:
-        with patch("src.payment.service.get_quote") as mock_get_quote:
-            mock_get_quote.return_value = []
-            service = PaymentService()
-            with pytest.raises(ValueError) as exc_info:
-                service.process_payment(_payload())
-            assert "nenhuma opção" in str(exc_info.value).lower()
-
-    def test_freight_api_error_raises_melhor_envio_error(
-        self, mock_repository: MagicMock, mock_mercadopago: MagicMock
-    ) -> None:
-        with patch("src.payment.service.get_quote") as mock_get_quote:
-            mock_get_quote.side_effect = MelhorEnvioAPIError("Timeout ao conectar")
-            service = PaymentService()
-            with pytest.raises(MelhorEnvioAPIError) as exc_info:
-                service.process_payment(_payload())
-            assert "Frete" in str(exc_info.value) or "Timeout" in str(exc_info.value)
-            mock_repository.get_product_price_and_stock.assert_not_called()
-
-    def test_freight_matches_chosen_service_option(
-        self, mock_repository: MagicMock, mock_mercadopago: MagicMock
-    ) -> None:
-        with patch("src.payment.service.get_quote") as mock_get_quote:
-            mock_get_quote.return_value = [OPTION_PAC, OPTION_JADLOG]
-            mock_repository.get_product_price_and_stock.return_value = {"id": 1, "price": 100.00, "stock": {"Único": 100}, "quantity": 100}
-            mock_mp = mock_mercadopago.return_value
-            mock_mp.payment.return_value.create.return_value = {
-                "status": 201,
-                "response": {"id": "mp-1", "status": "approved", "status_detail": "accredited"},
-            }
-            mock_repository.create_order.return_value = {"id": "order-1"}
-
-            service = PaymentService()
-            service.process_payment(_payload(frete=31.00, frete_service="jadlog_another"))
-            mock_repository.create_order.assert_called_once()
-
-    def test_freight_fallback_by_price_when_service_wrong(
-        self, mock_repository: MagicMock, mock_mercadopago: MagicMock
-    ) -> None:
-        """frete_service incorreto mas preço bate com alguma opção → aceita (fallback)."""
-        with patch("src.payment.service.get_quote") as mock_get_quote:
-            mock_get_quote.return_value = [OPTION_PAC, OPTION_JADLOG]
-            mock_repository.get_product_price_and_stock.return_value = {"id": 1, "price": 100.00, "stock": {"Único": 100}, "quantity": 100}
-            mock_mp = mock_mercadopago.return_value
-            mock_mp.payment.return_value.create.return_value = {
-                "status": 201,
-                "response": {"id": "mp-1", "status": "approved", "status_detail": "accredited"},
-            }
-            mock_repository.create_order.return_value = {"id": "order-1"}
-
-            service = PaymentService()
-            service.process_payment(_payload(frete=31.00, frete_service="wrong_service"))
-            mock_repository.create_order.assert_called_once()
-
-    def test_freight_service_wrong_and_price_invalid_raises_value_error(
-        self, mock_repository: MagicMock, mock_mercadopago: MagicMock
-    ) -> None:
-        """frete_service incorreto + preço sem correspondência na cotação → erro."""
-        with patch("src.payment.service.get_quote") as mock_get_quote:
-            mock_get_quote.return_value = [OPTION_PAC]
-            service = PaymentService()
-            with pytest.raises(ValueError) as exc_info:
-                service.process_payment(_payload(frete=99.99, frete_service="servico_inexistente"))
-            assert "não confere" in str(exc_info.value) or "Recalcule" in str(exc_info.value)
+        """Frete inválido falha antes da auditoria de preços: banco e MP não são chamados."""
+        mock_get_quote.configure_mock(**quote)
+
+        with pytest.raises(exc, match=match):
+            service.process_payment(_payload(**payload_kwargs))
+
+        mock_repository.get_product_price_and_stock.assert_not_called()
+        mock_mercadopago.return_value.payment.return_value.create.assert_not_called()
@@ -1,10 +1,9 @@
 import pytest
-from decimal import Decimal
 from unittest.mock import patch, MagicMock, call
 
 from src.payment.exceptions import MercadoPagoAPIError, PaymentDeclinedError
 from src.payment.service import PaymentService
-from src.payment.schemas import PaymentInput, Payer, Identification, Item
+from src.payment.schemas import Address, PaymentInput, Payer, Identification, Item
 
 
 @pytest.fixture
@@ -442,8 +441,6 @@ class TestPaymentServiceIntegration:
         Esperado: Endereço é enviado ao MP no formato correto.
         """
         # Arrange
-        from src.payment.schemas import Address
-        
         payload_with_address = PaymentInput(
             transaction_amount=75.90,  # 50 + 25.90
             frete=25.90,
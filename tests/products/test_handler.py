@@ -2,7 +2,7 @@ import json
 import pytest
 from unittest.mock import patch, MagicMock
 
-from src.products.handler import lambda_handler
+from src.products.handler import lambda_handler, _get_service
 
 
 def _event(
@@ -30,10 +30,12 @@ def _context():
 
 @pytest.fixture
 def mock_service():
+    _get_service.cache_clear()
     with patch("src.products.handler.ProductService") as mock_cls:
         instance = MagicMock()
         mock_cls.return_value = instance
         yield instance
+    _get_service.cache_clear()
 
 
 class TestHandlerGetListagem:
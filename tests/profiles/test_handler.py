@@ -0,0 +1,142 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+
+import service as profiles_service_module
+from src.profiles.handler import lambda_handler, _get_service
+
+
+def _event(method: str, query_params: dict | None = None, body=None, headers: dict | None = None) -> dict:
+    e = {
+        "requestContext": {"http": {"method": method}},
+        "queryStringParameters": query_params,
+        "headers": headers or {},
+    }
+    if body is not None:
+        e["body"] = body
+    return e
+
+
+def _context():
+    return MagicMock()
+
+
+@pytest.fixture
+def mock_service():
+    """ProfileService mockado; cache do _get_service limpo antes e depois (é reaproveitado entre invocações)."""
+    _get_service.cache_clear()
+    with patch.object(profiles_service_module, "ProfileService") as mock_cls:
+        instance = MagicMock()
+        mock_cls.return_value = instance
+        yield instance
+    _get_service.cache_clear()
+
+
+class TestHandlerList:
+    """GET /usuarios — query params validados em ProfileFilter e repassados ao service."""
+
+    def test_list_validates_filters_and_passes_admin_and_auth(self, mock_service: MagicMock) -> None:
+        mock_service.list_profiles.return_value = {"data": [], "meta": {"total": 0}}
+
+        resp = lambda_handler(
+            _event(
+                "GET",
+                query_params={"page": "2", "limit": "5", "email": "  a@b.com ", "role": "admin", "user_id": "adm-1"},
+                headers={"authorization": "Bearer tok"},
+            ),
+            _context(),
+        )
+
+        assert resp["statusCode"] == 200
+        assert json.loads(resp["body"]) == {"data": [], "meta": {"total": 0}}
+        filters = mock_service.list_profiles.call_args[0][0]
+        assert (filters.page, filters.limit, filters.email, filters.role, filters.sort) == (
+            2, 5, "a@b.com", "admin", "newest"
+        )
+        kwargs = mock_service.list_profiles.call_args.kwargs
+        assert kwargs["admin_user_id"] == "adm-1"
+        assert kwargs["authorization_header"] == "Bearer tok"
+
+    def test_list_defaults_without_query_params(self, mock_service: MagicMock) -> None:
+        mock_service.list_profiles.return_value = {"data": []}
+
+        lambda_handler(_event("GET"), _context())
+
+        filters = mock_service.list_profiles.call_args[0][0]
+        assert (filters.page, filters.limit, filters.email, filters.role) == (1, 10, None, None)
+
+    def test_list_invalid_filter_returns_400(self, mock_service: MagicMock) -> None:
+        resp = lambda_handler(_event("GET", query_params={"limit": "500"}), _context())
+
+        assert resp["statusCode"] == 400
+        assert json.loads(resp["body"])["error"] == "Dados inválidos"
+        mock_service.list_profiles.assert_not_called()
+
+
+class TestHandlerUpdateDelete:
+    """PUT/DELETE /usuarios — body JSON validado em ProfileUpdate/ProfileDelete."""
+
+    def test_update_passes_validated_payload(self, mock_service: MagicMock) -> None:
+        mock_service.update_profile.return_value = {"id": "u-1", "role": "admin"}
+
+        resp = lambda_handler(_event("PUT", body=json.dumps({"id": "u-1", "role": "admin"})), _context())
+
+        assert resp["statusCode"] == 200
+        payload = mock_service.update_profile.call_args[0][0]
+        assert (payload.id, payload.role, payload.email) == ("u-1", "admin", None)
+
+    def test_delete_passes_validated_payload(self, mock_service: MagicMock) -> None:
+        mock_service.delete_profile.return_value = {"message": "ok"}
+
+        resp = lambda_handler(_event("DELETE", body=json.dumps({"id": "u-1"})), _context())
+
+        assert resp["statusCode"] == 200
+        payload, current_user_id = mock_service.delete_profile.call_args[0]
+        assert payload.id == "u-1"
+        assert current_user_id is None
+
+    @pytest.mark.parametrize(
+        "method, body",
+        [
+            ("PUT", "{not json"),
+            ("PUT", json.dumps({"id": "u-1", "email": "sem-arroba"})),
+            ("PUT", json.dumps({"email": "a@b.com"})),  # id obrigatório
+            ("DELETE", "{not json"),
+            ("DELETE", json.dumps({})),
+        ],
+        ids=["put_malformed_json", "put_invalid_email", "put_missing_id", "delete_malformed_json", "delete_missing_id"],
+    )
+    def test_invalid_body_returns_400(self, mock_service: MagicMock, method: str, body: str) -> None:
+        resp = lambda_handler(_event(method, body=body), _context())
+
+        assert resp["statusCode"] == 400
+        assert json.loads(resp["body"])["error"] == "Dados inválidos"
+        mock_service.update_profile.assert_not_called()
+        mock_service.delete_profile.assert_not_called()
+
+
+class TestHandlerMisc:
+    def test_options_does_not_build_service(self, mock_service: MagicMock) -> None:
+        resp = lambda_handler(_event("OPTIONS"), _context())
+
+        assert resp["statusCode"] == 200
+        profiles_service_module.ProfileService.assert_not_called()
+
+    def test_method_not_allowed(self, mock_service: MagicMock) -> None:
+        assert lambda_handler(_event("PATCH"), _context())["statusCode"] == 405
+
+    def test_service_error_returns_500(self, mock_service: MagicMock) -> None:
+        mock_service.list_profiles.side_effect = RuntimeError("db down")
+
+        resp = lambda_handler(_event("GET"), _context())
+
+        assert resp["statusCode"] == 500
+        assert json.loads(resp["body"]) == {"error": "db down"}
+
+    def test_service_is_reused_between_invocations(self, mock_service: MagicMock) -> None:
+        mock_service.list_profiles.return_value = {"data": []}
+
+        lambda_handler(_event("GET"), _context())
+        lambda_handler(_event("GET"), _context())
+
+        profiles_service_module.ProfileService.assert_called_once()
@@ -60,7 +60,7 @@ class TestProfileRepositoryListAll:
         
         # Assert: Verifica cada chamada da cadeia
         mock_supabase_client.table.assert_called_once_with("profiles")
-        mock_table.select.assert_called_once_with("*", count="exact")
+        mock_table.select.assert_called_once_with("id,email,role,created_at", count="exact")
         mock_select.ilike.assert_called_once_with("email", "%teste%")
         mock_ilike.eq.assert_called_once_with("role", "admin")
         mock_eq.order.assert_called_once_with("created_at", desc=True)
@@ -99,7 +99,7 @@ class TestProfileRepositoryListAll:
         result = repo.list_all(filters)
         
         # Assert
-        mock_table.select.assert_called_once_with("*", count="exact")
+        mock_table.select.assert_called_once_with("id,email,role,created_at", count="estimated")
         mock_select.order.assert_called_once_with("created_at", desc=True)
         
         # Paginação: page=1, limit=10 → start=0, end=9
@@ -175,7 +175,8 @@ class TestProfileRepositoryListAll:
         filters = ProfileFilter(email="test@example.com")
         result = repo.list_all(filters)
         
-        # Assert
+        # Assert: com filtro o total precisa ser exato (paginação do backoffice)
+        mock_table.select.assert_called_once_with("id,email,role,created_at", count="exact")
         mock_select.ilike.assert_called_once_with("email", "%test@example.com%")
         # eq não deve ter sido chamado no select ou no ilike
         assert not hasattr(mock_ilike, 'eq') or mock_ilike.eq.call_count == 0
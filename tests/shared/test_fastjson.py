@@ -0,0 +1,31 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+from src.shared import fastjson
+
+
+class TestFastJson:
+    """Contrato comum a qualquer backend (orjson, ujson ou stdlib)."""
+
+    def test_loads_accepts_str_and_bytes(self) -> None:
+        assert fastjson.loads('{"a": 1}') == {"a": 1}
+        assert fastjson.loads(b'{"a": 1}') == {"a": 1}
+
+    def test_loads_invalid_raises_value_error(self) -> None:
+        with pytest.raises(ValueError):
+            fastjson.loads("{not json")
+
+    def test_dumps_returns_str_and_uses_default(self) -> None:
+        out = fastjson.dumps({"price": Decimal("10.5")}, default=float)
+        assert isinstance(out, str)
+        assert json.loads(out) == {"price": 10.5}
+
+    def test_dumps_bytes_returns_utf8_bytes(self) -> None:
+        out = fastjson.dumps_bytes({"nome": "São Paulo"})
+        assert isinstance(out, bytes)
+        assert json.loads(out.decode("utf-8")) == {"nome": "São Paulo"}
+
+    def test_non_str_keys_become_strings(self) -> None:
+        assert json.loads(fastjson.dumps({1: "a"})) == {"1": "a"}
@@ -0,0 +1,135 @@
+"""Testes da baixa de estoque no Firebase (transação por produto)."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# src.shared.firebase: tests/payment/conftest substitui "shared.firebase" por um MagicMock
+from src.shared import firebase as firebase_module
+
+
+class _FakeRef:
+    """Nó products/{id} com transaction() no contrato do firebase_admin."""
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+    def transaction(self, transaction_update):
+        # Como o SDK: exceção da função aborta; None seguiria para set_if_unchanged e falharia
+        new_value = transaction_update(self.value)
+        if new_value is None:
+            raise ValueError("Value must not be none.")
+        self.value = new_value
+        return new_value
+
+
+class _Item:
+    def __init__(self, id, quantity, size=None) -> None:
+        self.id = id
+        self.quantity = quantity
+        self.size = size
+
+
+@pytest.fixture
+def fake_db():
+    """get_firebase_db() devolve uma raiz cujo child('products').child(id) é um _FakeRef por ID."""
+    refs: dict = {}
+    root = MagicMock()
+    root.child.return_value.child.side_effect = lambda product_id: refs.setdefault(product_id, _FakeRef(None))
+    with patch.object(firebase_module, "get_firebase_db", return_value=root), patch.object(
+        firebase_module, "logger"
+    ) as mock_logger:
+        yield refs, mock_logger
+
+
+class TestApplySaleToProduct:
+    """_apply_sale_to_product: baixa no tamanho vendido (ou 'Único') e recalcula quantity."""
+
+    @pytest.mark.parametrize(
+        "stock, size, sold, expected_stock",
+        [
+            ({"M": 5, "G": 2}, "M", 3, {"M": 2, "G": 2}),
+            ({"Único": 4}, "M", 1, {"Único": 3}),  # tamanho ausente: cai no 'Único'
+            ({"M": 1}, "M", 5, {"M": 0}),  # nunca negativo
+        ],
+        ids=["size", "fallback_unico", "no_negative"],
+    )
+    def test_applies_sale(self, stock: dict, size: str, sold: int, expected_stock: dict) -> None:
+        data = firebase_module._apply_sale_to_product({"id": 1, "stock": dict(stock)}, size, sold)
+        assert data["stock"] == expected_stock
+        assert data["quantity"] == sum(expected_stock.values())
+
+    @pytest.mark.parametrize("data", [None, "x"], ids=["missing", "not_a_dict"])
+    def test_missing_product_aborts(self, data) -> None:
+        with pytest.raises(firebase_module._ProductNotFound):
+            firebase_module._apply_sale_to_product(data, "M", 1)
+
+
+class TestDecrementProductsQuantity:
+    """decrement_products_quantity: uma transação por item; produto inexistente só gera aviso."""
+
+    def test_decrements_each_item(self, fake_db) -> None:
+        refs, mock_logger = fake_db
+        refs["1"] = _FakeRef({"id": 1, "stock": {"M": 5}, "quantity": 5})
+        refs["2"] = _FakeRef({"id": 2, "stock": {"Único": 3}, "quantity": 3})
+
+        firebase_module.decrement_products_quantity([_Item(1, 2, "M"), _Item(2, 1)])
+
+        assert refs["1"].value["stock"] == {"M": 3} and refs["1"].value["quantity"] == 3
+        assert refs["2"].value["stock"] == {"Único": 2} and refs["2"].value["quantity"] == 2
+        mock_logger.error.assert_not_called()
+
+    def test_missing_product_logs_not_found_and_continues(self, fake_db) -> None:
+        refs, mock_logger = fake_db
+        refs["2"] = _FakeRef({"id": 2, "stock": {"Único": 3}, "quantity": 3})
+
+        firebase_module.decrement_products_quantity([_Item(1, 1), _Item(2, 1)])
+
+        assert refs["1"].value is None  # nada gravado
+        assert refs["2"].value["quantity"] == 2
+        mock_logger.warning.assert_called_once()
+        assert "not found" in mock_logger.warning.call_args[0][0]
+        mock_logger.error.assert_not_called()
+
+    def test_transaction_error_is_logged(self, fake_db) -> None:
+        refs, mock_logger = fake_db
+        refs["1"] = MagicMock()
+        refs["1"].transaction.side_effect = RuntimeError("aborted")
+
+        firebase_module.decrement_products_quantity([_Item(1, 1)])
+
+        mock_logger.error.assert_called_once()
+        assert "Firebase stock update failed for product 1" in mock_logger.error.call_args[0][0]
+
+    def test_skips_items_without_id_or_quantity(self, fake_db) -> None:
+        refs, _ = fake_db
+        firebase_module.decrement_products_quantity([_Item(None, 1), _Item(1, 0)])
+        assert refs == {}
+
+
+@pytest.fixture
+def fake_sdk():
+    """firebase_admin falso em sys.modules (o SDK não está instalado em dev), com o singleton zerado."""
+    sdk = MagicMock()
+    with patch.dict("sys.modules", {
+        "firebase_admin": sdk,
+        "firebase_admin.credentials": sdk.credentials,
+        "firebase_admin.db": sdk.db,
+    }), patch.object(firebase_module, "_firebase_db", None), patch.object(
+        firebase_module, "_firebase_credentials", return_value=("p", "e", "k", "https://db")
+    ):
+        yield sdk
+
+
+class TestGetFirebaseDb:
+    """Inicialização do app padrão pela API pública (get_app / initialize_app)."""
+
+    def test_reuses_existing_app(self, fake_sdk) -> None:
+        assert firebase_module.get_firebase_db() is fake_sdk.db.reference.return_value
+        fake_sdk.initialize_app.assert_not_called()
+
+    def test_initializes_app_when_missing(self, fake_sdk) -> None:
+        fake_sdk.get_app.side_effect = ValueError("The default Firebase app does not exist.")
+        firebase_module.get_firebase_db()
+        fake_sdk.initialize_app.assert_called_once()
+        assert fake_sdk.initialize_app.call_args.args[1] == {"databaseURL": "https://db"}
@@ -1,7 +1,8 @@
 import json
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, PropertyMock
 
+from src.shared import melhor_envio
 from src.shared.melhor_envio import (
     MelhorEnvioAPIError,
     get_quote,
@@ -72,61 +73,140 @@ class TestParseResponse:
         assert _parse_response({"other": 1}) == []
 
 
+def _clear_config_cache() -> None:
+    """Env/headers ficam em cache no módulo; cada teste parte do env que ele mesmo define."""
+    melhor_envio._env.cache_clear()
+    melhor_envio._url.cache_clear()
+    melhor_envio._headers.cache_clear()
+
+
 class TestGetQuote:
-    """Chamada HTTP à API (mock de urllib)."""
+    """Chamada HTTP à API (mock do pool urllib3)."""
 
     @pytest.fixture(autouse=True)
     def env_vars(self):
+        _clear_config_cache()
         with patch.dict(
             "os.environ",
             {"MELHOR_ENVIO_TOKEN": "fake-token", "CEP_ORIGEM": "59082000"},
             clear=False,
         ):
             yield
+        _clear_config_cache()
 
     def test_builds_payload_and_returns_parsed_options(self, env_vars) -> None:
         api_response = [
             {"name": "Correios PAC", "price": 25.90, "delivery_time": 8},
         ]
-        with patch("src.shared.melhor_envio.urllib.request.urlopen") as mock_open:
+        with patch("src.shared.melhor_envio._http") as mock_http:
             resp = MagicMock()
             resp.status = 200
-            resp.read.return_value = json.dumps(api_response).encode("utf-8")
-            resp.__enter__ = MagicMock(return_value=resp)
-            resp.__exit__ = MagicMock(return_value=False)
-            mock_open.return_value = resp
+            resp.data = json.dumps(api_response).encode("utf-8")
+            mock_http.request.return_value = resp
 
             result = get_quote("01310100", [{"width": 11, "height": 17, "length": 11, "weight": 0.3, "quantity": 1}])
 
             assert len(result) == 1
             assert result[0]["preco"] == 25.90
-            mock_open.assert_called_once()
-            call_args = mock_open.call_args[0][0]
-            assert call_args.data is not None
-            payload = json.loads(call_args.data.decode("utf-8"))
+            mock_http.request.assert_called_once()
+            method, url = mock_http.request.call_args[0]
+            assert method == "POST"
+            assert url.endswith("/api/v2/me/shipment/calculate")
+            body = mock_http.request.call_args.kwargs["body"]
+            assert body is not None
+            payload = json.loads(body)
             assert payload["from"]["postal_code"] == "59082000"
             assert payload["to"]["postal_code"] == "01310100"
             assert len(payload["products"]) == 1
             assert payload["products"][0]["weight"] == 0.3
 
+    def test_retries_transient_errors_only_without_timeout_budget(self, env_vars) -> None:
+        products = [{"width": 10, "height": 10, "length": 10, "weight": 1}]
+        with patch("src.shared.melhor_envio._http") as mock_http:
+            resp = MagicMock(status=200, data=b"[]")
+            mock_http.request.return_value = resp
+            get_quote("01310100", products)
+            assert mock_http.request.call_args.kwargs["retries"] is melhor_envio._QUOTE_RETRY
+            get_quote("01310100", products, timeout_sec=5)
+            assert mock_http.request.call_args.kwargs["retries"] is False
+
+    def test_pool_has_no_default_retry(self, env_vars) -> None:
+        """Retry é opt-in por chamada: o pool não retenta nada sozinho."""
+        assert melhor_envio._http.connection_pool_kw["retries"].total is False
+        with patch("src.shared.melhor_envio._http") as mock_http:
+            mock_http.request.return_value = MagicMock(status=200, data=b"{}")
+            melhor_envio._api_request(melhor_envio.CART_PATH, body={"a": 1})
+        assert mock_http.request.call_args.kwargs["retries"] is melhor_envio._API_RETRY
+
+    def test_quote_retry_fits_api_gateway_budget(self, env_vars) -> None:
+        """Timeout de leitura não é retentado; tentativas + esperas máximas cabem em ~25s."""
+        retry = melhor_envio._QUOTE_RETRY
+        assert retry.read == 0
+        with patch("src.shared.melhor_envio._http") as mock_http:
+            mock_http.request.return_value = MagicMock(status=200, data=b"[]")
+            get_quote("01310100", [{"width": 10, "height": 10, "length": 10, "weight": 1}])
+        timeout = mock_http.request.call_args.kwargs["timeout"]
+        attempts = retry.total + 1
+        worst_case = attempts * timeout.total + retry.total * melhor_envio.RETRY_AFTER_MAX_SEC
+        assert worst_case <= 25
+
+    def test_quote_retry_caps_retry_after(self) -> None:
+        resp = MagicMock()
+        resp.headers = {"Retry-After": "60"}
+        assert melhor_envio._QUOTE_RETRY.get_retry_after(resp) == melhor_envio.RETRY_AFTER_MAX_SEC
+        assert melhor_envio._QUOTE_RETRY.new(total=1).get_retry_after(resp) == melhor_envio.RETRY_AFTER_MAX_SEC
+
     def test_raises_on_http_error(self, env_vars) -> None:
-        import urllib.error
-        with patch("src.shared.melhor_envio.urllib.request.urlopen") as mock_open:
-            mock_open.side_effect = urllib.error.HTTPError(
-                "http://x", 500, "Error", {}, None
-            )
+        with patch("src.shared.melhor_envio._http") as mock_http:
+            resp = MagicMock()
+            resp.status = 500
+            resp.data = b"Error"
+            mock_http.request.return_value = resp
             with pytest.raises(MelhorEnvioAPIError) as exc_info:
                 get_quote("01310100", [{"width": 11, "height": 17, "length": 11, "weight": 0.3, "quantity": 1}])
             assert "500" in str(exc_info.value)
 
+    def test_error_body_is_read_only_up_to_limit(self, env_vars) -> None:
+        import io
+        import urllib3
+        resp = urllib3.HTTPResponse(body=io.BytesIO(b"x" * 10_000), status=500, preload_content=False)
+        with patch("src.shared.melhor_envio._http") as mock_http:
+            mock_http.request.return_value = resp
+            with pytest.raises(MelhorEnvioAPIError) as exc_info:
+                melhor_envio._api_request(melhor_envio.CART_PATH, body={"a": 1})
+        assert str(exc_info.value).count("x") == melhor_envio.ERROR_BODY_MAX_BYTES
+        assert mock_http.request.call_args.kwargs["preload_content"] is False
+
     def test_raises_on_timeout(self, env_vars) -> None:
-        import urllib.error
-        with patch("src.shared.melhor_envio.urllib.request.urlopen") as mock_open:
-            mock_open.side_effect = TimeoutError("timed out")
+        from urllib3.exceptions import ReadTimeoutError
+        with patch("src.shared.melhor_envio._http") as mock_http:
+            mock_http.request.side_effect = ReadTimeoutError(None, "http://x", "timed out")
             with pytest.raises(MelhorEnvioAPIError) as exc_info:
                 get_quote("01310100", [{"width": 11, "height": 17, "length": 11, "weight": 0.3, "quantity": 1}])
             assert "Timeout" in str(exc_info.value)
 
+    def test_raises_on_timeout_while_reading_body(self, env_vars) -> None:
+        from urllib3.exceptions import ReadTimeoutError
+        resp = MagicMock(status=200)
+        type(resp).data = PropertyMock(side_effect=ReadTimeoutError(None, "http://x", "timed out"))
+        with patch("src.shared.melhor_envio._http") as mock_http:
+            mock_http.request.return_value = resp
+            with pytest.raises(MelhorEnvioAPIError) as exc_info:
+                get_quote("01310100", [{"width": 11, "height": 17, "length": 11, "weight": 0.3, "quantity": 1}])
+        assert "Timeout" in str(exc_info.value)
+        resp.release_conn.assert_called_once()
+
+    def test_raises_on_timeout_while_reading_error_body(self, env_vars) -> None:
+        from urllib3.exceptions import ReadTimeoutError
+        resp = MagicMock(status=500)
+        resp.read.side_effect = ReadTimeoutError(None, "http://x", "timed out")
+        with patch("src.shared.melhor_envio._http") as mock_http:
+            mock_http.request.return_value = resp
+            with pytest.raises(MelhorEnvioAPIError) as exc_info:
+                melhor_envio._api_request(melhor_envio.CART_PATH, body={"a": 1})
+        assert "Timeout" in str(exc_info.value)
+        resp.release_conn.assert_called_once()
+
     def test_raises_when_token_missing(self) -> None:
         with patch.dict("os.environ", {}, clear=True):
             with pytest.raises(MelhorEnvioAPIError) as exc_info:
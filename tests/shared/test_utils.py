@@ -1,10 +1,10 @@
 import json
 import pytest
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from unittest.mock import patch, MagicMock
 
-from shared.responses import http_response
+from shared.responses import http_response, options_response
 from shared.database import get_supabase_client
 
 
@@ -140,6 +140,36 @@ class TestHttpResponse:
         assert parsed_body["items"][0]["price"] == "50.25"
         assert parsed_body["metadata"]["discount"] == "10.00"
 
+    def test_http_response_serializes_subclasses_of_decimal_and_dates(self) -> None:
+        """
+        Cenário: Subclasses de Decimal/datetime/date (ex.: tipos de drivers ou libs de data).
+        Esperado: Convertidas como o tipo base (isinstance), sem TypeError.
+        """
+        class MyDecimal(Decimal):
+            pass
+
+        class MyDateTime(datetime):
+            pass
+
+        class MyDate(date):
+            pass
+
+        body = {
+            "price": MyDecimal("10.5"),
+            "qty": MyDecimal("3"),
+            "at": MyDateTime(2026, 1, 25, 10, 0, 0),
+            "day": MyDate(2026, 1, 25),
+        }
+
+        parsed_body = json.loads(http_response(200, body)["body"])
+
+        assert parsed_body == {"price": 10.5, "qty": 3, "at": "2026-01-25T10:00:00", "day": "2026-01-25"}
+
+    def test_http_response_unsupported_type_raises(self) -> None:
+        """Tipo sem conversor continua levantando TypeError."""
+        with pytest.raises(TypeError):
+            http_response(200, {"x": object()})
+
     def test_http_response_empty_body(self) -> None:
         """
         Cenário: Body vazio (usado em OPTIONS).
@@ -155,6 +185,19 @@ class TestHttpResponse:
         assert response["statusCode"] == 200
         assert response["body"] == "{}"
 
+    def test_mutating_one_response_does_not_leak_into_the_next(self) -> None:
+        """Headers de uma resposta (inclusive do OPTIONS) são cópias, não o template do módulo."""
+        first = http_response(200, {})
+        first["headers"]["X-Extra"] = "1"
+        first_options = options_response()
+        first_options["headers"]["X-Extra"] = "1"
+        first_options["statusCode"] = 500
+
+        assert "X-Extra" not in http_response(200, {})["headers"]
+        options = options_response()
+        assert "X-Extra" not in options["headers"]
+        assert options["statusCode"] == 204
+
 
 class TestGetSupabaseClient:
     """Testes para a função get_supabase_client (Singleton pattern + config)."""
@@ -2,6 +2,8 @@ import importlib.util
 import sys
 from pathlib import Path
 
+import pytest
+
 _root = Path(__file__).resolve().parents[2]
 shipping_path = str(_root / "src" / "shipping")
 payment_path = str(_root / "src" / "payment")
@@ -27,3 +29,16 @@ def _inject_shipping_modules():
         spec_sv.loader.exec_module(mod_sv)
 
 _inject_shipping_modules()
+
+
+@pytest.fixture(autouse=True)
+def _clear_quote_cache():
+    """Cache de cotações é por módulo: cada teste começa sem respostas guardadas."""
+    import src.shipping.service as pkg_service
+
+    caches = (pkg_service._QUOTE_CACHE, sys.modules["service"]._QUOTE_CACHE)
+    for cache in caches:
+        cache.clear()
+    yield
+    for cache in caches:
+        cache.clear()
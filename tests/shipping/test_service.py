@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import patch, MagicMock
 
 from src.shipping.schemas import FreightQuoteInput, ShippingItemInput
+from src.shipping import service as service_module
 from src.shipping.service import quote_freight
 from src.shared.melhor_envio import MelhorEnvioAPIError
 
@@ -45,3 +46,28 @@ class TestQuoteFreight:
             with pytest.raises(MelhorEnvioAPIError) as exc_info:
                 quote_freight(valid_quote_payload)
             assert "Timeout" in str(exc_info.value)
+
+    def test_repeated_quote_is_served_from_cache(self, valid_quote_payload) -> None:
+        with patch("src.shipping.service.get_quote") as mock_get_quote:
+            mock_get_quote.return_value = [{"transportadora": "PAC", "preco": 20.0, "prazo_entrega_dias": 8}]
+            first = quote_freight(valid_quote_payload)
+            second = quote_freight(valid_quote_payload)
+            assert first == second
+            mock_get_quote.assert_called_once()
+
+    def test_expired_entry_is_quoted_again(self, valid_quote_payload) -> None:
+        with patch("src.shipping.service.get_quote") as mock_get_quote, \
+                patch("src.shipping.service.time.monotonic") as mock_clock:
+            mock_get_quote.return_value = []
+            mock_clock.return_value = 1000.0
+            quote_freight(valid_quote_payload)
+            mock_clock.return_value = 1000.0 + service_module._QUOTE_TTL_SEC + 1
+            quote_freight(valid_quote_payload)
+            assert mock_get_quote.call_count == 2
+
+    def test_errors_are_not_cached(self, valid_quote_payload) -> None:
+        with patch("src.shipping.service.get_quote") as mock_get_quote:
+            mock_get_quote.side_effect = [MelhorEnvioAPIError("Timeout"), []]
+            with pytest.raises(MelhorEnvioAPIError):
+                quote_freight(valid_quote_payload)
+            assert quote_freight(valid_quote_payload) == []
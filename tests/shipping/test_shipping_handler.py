@@ -1,3 +1,4 @@
+import base64
 import json
 import pytest
 from unittest.mock import patch
@@ -48,6 +49,23 @@ class TestShippingHandler:
             assert data["opcoes"][0]["preco"] == 25.90
             mock_quote.assert_called_once()
 
+    def test_base64_encoded_body_is_decoded(self) -> None:
+        body = {"cep_destino": "01310100", "itens": [{"width": 11, "height": 17, "length": 11, "weight": 0.3}]}
+        with patch("src.shipping.handler.parse") as mock_parse, patch("src.shipping.handler.quote_freight") as mock_quote:
+            mock_quote.return_value = []
+            event = _event(method="POST")
+            event["body"] = base64.b64encode(json.dumps(body).encode("utf-8")).decode("ascii")
+            event["isBase64Encoded"] = True
+            resp = lambda_handler(event, None)
+            assert resp["statusCode"] == 200
+            assert mock_parse.call_args.kwargs["event"] == body
+
+    def test_invalid_json_body_returns_400(self) -> None:
+        event = _event(method="POST")
+        event["body"] = "{not json"
+        resp = lambda_handler(event, None)
+        assert resp["statusCode"] == 400
+
     def test_validation_error_returns_400(self) -> None:
         with patch("src.shipping.handler.parse") as mock_parse:
             mock_parse.side_effect = ValueError("CEP deve conter 8 dígitos")